@@ -1,34 +1,96 @@
+import json
 from typing import Any
 
-from lib import fltk
-
-from src import graphic
 from src.board import Board
-from src.main import play
-from src.parser import parse_args, parse_map
-from src.settings import TEXT_MODE
-from src.solve import solve, fast_solve, SOLVERS
+from src.cache import SolutionCache
+from src.graph import StateGraph
+from src.heuristic import HEURISTICS
+from src.parser import parse_args, parse_map, SOLVER_OPTIONS
+from src.png import PNGImage
+from src.settings import TEXT_MODE, RRADIUS
+from src.solve import solve, fast_solve, search, SOLVERS
 
 
 def initiate_board_mode(args: dict[str, Any], board: list[str]):
+    from lib import fltk
+    from src import graphic
+
+    radius = RRADIUS if args["radius"] is None else args["radius"]
     graphic.create_window_board(board, args["dim"])
-    graphic.draw_board(board, args["dim"])
-    graphic.draw_grid(
-        len(board[0]) * args["dim"], len(board) * args["dim"], args["dim"]
-    )
+    graphic.draw_board_background(board, args["dim"], radius)
     fltk.mise_a_jour()
-    return Board.load_board(board, args["dim"])
+    return Board.load_board(board, args["dim"], radius)
 
 
 def initiate_image_mode(args: dict[str, Any]):
-    image = graphic.create_window_image(args["map"])
-    graphic.draw_grid(image.width(), image.height(), args["spacing"])
+    from lib import fltk
+    from src import graphic
+
+    image = graphic.create_window_image(args["map"], args["spacing"])
     fltk.mise_a_jour()
-    return Board.load_image(image, args["spacing"])
+    if args["radius"] is None:
+        return Board.load_image(image, args["spacing"])
+    return Board.load_image(image, args["spacing"], args["radius"])
+
+
+def initiate_headless_mode(args: dict[str, Any]):
+    if args["mode"] == TEXT_MODE:
+        radius = RRADIUS if args["radius"] is None else args["radius"]
+        return Board.load_board(parse_map(args["map"]), args["dim"], radius)
+    image = PNGImage.open(args["map"])
+    if args["radius"] is None:
+        return Board.load_image(image, args["spacing"])
+    return Board.load_image(image, args["spacing"], args["radius"])
+
+
+def solver_options(args: dict[str, Any]) -> dict[str, Any]:
+    options = {
+        option: args[option] for option in SOLVER_OPTIONS if args[option] is not None
+    }
+    if "heuristic" in options:
+        options["heuristic"] = HEURISTICS[options["heuristic"]]
+    return options
+
+
+def solution_cache(args: dict[str, Any]):
+    if args["cache"] is None:
+        return None
+    return SolutionCache(args["cache"])
+
+
+def headless(args: dict[str, Any]):
+    board = initiate_headless_mode(args)
+    if args["graph"]:
+        board.graph = StateGraph.open(args["map"], board, args["rule"])
+
+    solver, options = SOLVERS[args["solve"]], solver_options(args)
+    result = search(
+        board,
+        solver,
+        args["rule"],
+        args["profile"],
+        solution_cache(args),
+        args["deadline"],
+        **options,
+    )
+    result = {**result.to_dict(), "map": args["map"], "solver": args["solve"]}
+    if args["output"] is None:
+        print(json.dumps(result))
+    else:
+        with open(args["output"], "w", encoding="UTF-8") as file:
+            json.dump(result, file)
 
 
 def main():
     args = parse_args()
+    if args["headless"]:
+        headless(args)
+        return
+
+    from lib import fltk
+    from src import graphic
+    from src.main import play
+
     if args["mode"] == TEXT_MODE:
         board = parse_map(args["map"])
         board = initiate_board_mode(args, board)
@@ -36,10 +98,32 @@ def main():
         board = initiate_image_mode(args)
 
     if args["solve"] is not None:
+        if args["graph"]:
+            board.graph = StateGraph.open(args["map"], board, args["rule"])
+
+        solver, options = SOLVERS[args["solve"]], solver_options(args)
+        cache, deadline = solution_cache(args), args["deadline"]
         if args["opti"]:
-            fast_solve(board, SOLVERS[args["solve"]], args["time"], args["rule"])
+            result = fast_solve(
+                board, solver, args["rule"], args["profile"], cache, deadline, **options
+            )
         else:
-            solve(board, SOLVERS[args["solve"]], args["time"], args["rule"])
+            result = solve(
+                board,
+                solver,
+                args["rule"],
+                args["profile"],
+                cache,
+                deadline,
+                args["heatmap"],
+                **options,
+            )
+
+        if result is not None:
+            print(result.summary(args["time"]))
+            if args["profile"]:
+                print(result.stats.report(result.time))
+            graphic.wait_exit()
     else:
         play(board, args["rule"])
     fltk.ferme_fenetre()
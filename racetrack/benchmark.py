@@ -0,0 +1,23 @@
+from src.benchmark import benchmark, default_maps, write_json, write_csv
+from src.parser import parse_benchmark_args
+
+
+def main():
+    args = parse_benchmark_args()
+    runs = benchmark(
+        args["maps"] or default_maps(),
+        args["solvers"],
+        args["rules"],
+        args["repeat"],
+        args["timeout"],
+        args["tracemalloc"],
+        args["workers"],
+    )
+    if args["json"] is not None:
+        write_json(args["json"], runs)
+    if args["csv"] is not None:
+        write_csv(args["csv"], runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from src.cache import SolutionCache
+from src.parser import parse_cache_args
+
+
+def main():
+    args = parse_cache_args()
+    cache = SolutionCache(args["directory"])
+    if args["command"] == "clear":
+        print(f"Removed {cache.clear()} results from {cache.directory}")
+        return
+
+    entries = cache.entries()
+    for entry in entries:
+        # fields missing from a malformed entry are None
+        options = (entry["options"] or {}).items()
+        options = " ".join(f"{name}={value}" for name, value in options)
+        solver, rule = entry["solver"] or "?", entry["rule"] or "?"
+        length = "no solution" if entry["length"] is None else entry["length"]
+        time = "?" if entry["time"] is None else f"{entry['time']:.3f}"
+        print(
+            f"{entry['key'][:12]}  {solver:<22}{rule:<8}"
+            f"{length:<12}{time:>10}s  "
+            f"{datetime.fromtimestamp(entry['used']):%Y-%m-%d %H:%M}  {options}"
+        )
+    size = sum(entry["size"] for entry in entries)
+    print(f"{len(entries)} results, {size} bytes in {cache.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -56,6 +56,7 @@ __all__ = [
     "arc",
     "point",
     "image",
+    "oublie_image",
     "texte",
     "taille_texte",
     # effacer
@@ -594,6 +595,19 @@ def _load_pil_image(
     return ph_image  # type:ignore
 
 
+def oublie_image(fichier: str) -> None:
+    """
+    Oublie les images chargées depuis ``fichier``, qui sera relu au prochain
+    appel à ``image``. Les objets affichant ces images doivent avoir été
+    effacés.
+
+    :param str fichier: nom du fichier contenant l'image
+    """
+    chemin = Path(fichier)
+    for cle in [cle for cle in __img if cle[0] == chemin]:
+        del __img[cle]
+
+
 # Texte
 
 
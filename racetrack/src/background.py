@@ -0,0 +1,136 @@
+"""Contains the thread running a search while it is displayed
+
+The visual solver used to expand one node per frame, so the search ran at the
+refresh rate of the window. The search now runs in its own thread, as fast as
+the interpreter lets it, and the window samples the last node it expanded at a
+fixed frame rate. A thread is used rather than a process so the solver keeps
+sharing the board and the statistics with the window: the window sleeps
+between frames, which leaves the interpreter to the search most of the time.
+"""
+
+from threading import Condition, Thread
+from typing import Generator, Optional
+
+from src.board import Cell
+from src.heatmap import Heatmap
+from src.node import Node
+from src.stats import SearchStats
+
+__all__ = ["BackgroundSearch"]
+
+
+class BackgroundSearch(Thread):
+    """Thread expanding the nodes of a search until it ends or is stopped.
+    It can be paused, then expanded one node at a time
+
+    Attributes
+    ----------
+    gen : Generator[Node, None, list[Cell]]
+        search to run, as returned by a solver
+    stats : SearchStats
+        statistics filled by the search
+    heatmap : Heatmap
+        expansions counted per position, None if they are not counted
+    node : Node
+        last node expanded, None before the first one
+    attempts : int
+        number of nodes expanded
+    solution : list[Cell]
+        trajectory returned by the search once it ended, None if there is
+        none
+    paused : bool
+        True if the search waits for `resume` or `step`
+    stopped : bool
+        True if the search was asked to stop
+    error : BaseException
+        exception raised by the search, None if there is none
+    """
+
+    def __init__(
+        self,
+        gen: Generator[Node, None, list[Cell]],
+        stats: SearchStats,
+        heatmap: Optional[Heatmap] = None,
+    ) -> None:
+        """Constructor of the 'BackgroundSearch' object
+
+        Parameters
+        ----------
+        gen : Generator[Node, None, list[Cell]]
+            search to run
+        stats : SearchStats
+            statistics filled by the search
+        heatmap : Heatmap, optional
+            counts the expansions of each position, by default None
+        """
+        super().__init__(name="search", daemon=True)
+        self.gen = gen
+        self.stats = stats
+        self.heatmap = heatmap
+        self.node: Optional[Node] = None
+        self.attempts = 0
+        self.solution: Optional[list[Cell]] = None
+        self.paused = False
+        self.stopped = False
+        self.error: Optional[BaseException] = None
+        self.steps = 0
+        self.condition = Condition()
+
+    def run(self) -> None:
+        visit = self.heatmap.visit if self.heatmap is not None else None
+        try:
+            while True:
+                if self.paused or self.stopped:
+                    with self.condition:
+                        while self.paused and not self.steps and not self.stopped:
+                            self.condition.wait()
+                        if self.stopped:
+                            return
+                        self.steps = max(0, self.steps - 1)
+                try:
+                    self.node = next(self.gen)
+                except StopIteration as stop:
+                    self.solution = stop.value
+                    return
+                self.attempts += 1
+                if visit is not None:
+                    visit(self.node.position)
+        except BaseException as error:  # raised again by `result`
+            self.error = error
+
+    @property
+    def done(self) -> bool:
+        """True once the search ended, was stopped or failed"""
+        return self.ident is not None and not self.is_alive()
+
+    def pause(self) -> None:
+        with self.condition:
+            self.paused = True
+
+    def resume(self) -> None:
+        with self.condition:
+            self.paused, self.steps = False, 0
+            self.condition.notify()
+
+    def step(self) -> None:
+        """Expand one more node while paused"""
+        with self.condition:
+            if self.paused:
+                self.steps += 1
+                self.condition.notify()
+
+    def stop(self) -> None:
+        """Stop expanding nodes and wait for the thread to end, the search
+        itself being left open"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.join()
+
+    def result(self) -> Optional[list[Cell]]:
+        """Trajectory returned by the search, which must be done. The
+        exception raised by the search, if any, is raised again"""
+        self.join()
+        if self.error is not None:
+            raise self.error
+        return self.solution
@@ -0,0 +1,307 @@
+"""Contains the benchmark runner comparing the solvers on every map
+
+Every run solves one map under one rule with one solver in its own process, so
+a run can be stopped when it exceeds its time limit, and the peak resident
+memory measured belongs to that run only. Runs are repeated to estimate the
+variance of the measures, then summarized per map, rule and solver. Solvers
+distributing the search over processes are measured with each number of
+workers asked for, to compare their speedup.
+"""
+
+import csv
+import json
+import signal
+import statistics
+import sys
+import tracemalloc
+from inspect import signature
+from multiprocessing import Process, Queue
+from pathlib import Path
+from queue import Empty
+from time import perf_counter
+from typing import Any, Optional
+
+try:
+    import resource
+
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+from src.board import Board
+from src.parser import parse_map
+from src.png import PNGImage
+from src.settings import BLOCK_SIZE, DEFAULT_SPACING, LAX_RULE, STRICT_RULE
+from src.solve import SOLVERS, search
+
+__all__ = ["default_maps", "benchmark", "summarize", "write_json", "write_csv"]
+
+MAPS_DIRECTORY = Path(__file__).resolve().parents[2] / "maps"
+
+COLUMNS = [
+    "map",
+    "rule",
+    "solver",
+    "workers",
+    "runs",
+    "solved",
+    "length",
+    "time_mean",
+    "time_stdev",
+    "time_min",
+    "nodes",
+    "nodes_per_second",
+    "frontier",
+    "peak_rss",
+    "tracemalloc_peak",
+    "timeouts",
+    "errors",
+]
+
+
+def default_maps() -> list[str]:
+    """Every text-based and image-based map shipped with the game"""
+    return sorted(
+        str(path)
+        for pattern in ("text/*.txt", "image/*.png")
+        for path in MAPS_DIRECTORY.glob(pattern)
+    )
+
+
+def load(path: str) -> Board:
+    if path.endswith(".png"):
+        return Board.load_image(PNGImage.open(path), DEFAULT_SPACING)
+    return Board.load_board(parse_map(path), BLOCK_SIZE)
+
+
+def measure(
+    path: str, name: str, rule: str, trace: bool, options: dict[str, Any]
+) -> dict[str, Any]:
+    """Solve `path` once and measure the search, the loading of the board
+    being timed apart"""
+    start = perf_counter()
+    board = load(path)
+    load_time = perf_counter() - start
+
+    if trace:
+        tracemalloc.start()
+    result = search(board, SOLVERS[name], rule, **options)
+
+    res = {
+        "load_time": load_time,
+        "time": result.time,
+        "nodes": result.expanded,
+        "nodes_per_second": result.expanded / result.time if result.time else None,
+        "frontier": result.stats.frontier,
+        "skipped": result.stats.skip,
+        "length": result.length,
+        "peak_rss": None,
+        "tracemalloc_peak": None,
+    }
+    if trace:
+        res["tracemalloc_peak"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if RESOURCE_AVAILABLE:
+        # kilobytes on Linux, bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        res["peak_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return res
+
+
+def child(
+    path: str,
+    name: str,
+    rule: str,
+    trace: bool,
+    options: dict[str, Any],
+    results: Queue,
+) -> None:
+    # leave through `finally` blocks, which stop the workers of parallel solvers
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+    try:
+        results.put(measure(path, name, rule, trace, options))
+    except Exception as error:  # reported instead of killing the benchmark
+        results.put({"error": repr(error)})
+
+
+def run(
+    path: str,
+    name: str,
+    rule: str,
+    timeout: float,
+    trace: bool,
+    options: dict[str, Any],
+) -> dict:
+    """Measure one run in a new process, stopped after `timeout` seconds"""
+    results = Queue()
+    process = Process(target=child, args=(path, name, rule, trace, options, results))
+    process.start()
+    try:
+        res = results.get(timeout=timeout)
+    except Empty:
+        res = {"timeout": True}
+        process.terminate()
+    process.join(5)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    return res
+
+
+def benchmark(
+    maps: list[str],
+    solvers: list[str],
+    rules: list[str] = (LAX_RULE, STRICT_RULE),
+    repeat: int = 3,
+    timeout: float = 60,
+    trace: bool = False,
+    workers: Optional[list[int]] = None,
+    log: bool = True,
+) -> list[dict[str, Any]]:
+    """Run every solver on every map under every rule it supports
+
+    Parameters
+    ----------
+    maps : list[str]
+        paths of the maps, image-based maps being the '.png' ones
+    solvers : list[str]
+        names of the solvers in `SOLVERS`
+    rules : list[str], optional
+        rules to apply to movements, by default both
+    repeat : int, optional
+        number of runs of each combination, by default 3
+    timeout : float, optional
+        time limit of a run in seconds, by default 60
+    trace : bool, optional
+        measure the peak memory allocated with tracemalloc, which slows the
+        search down, by default False
+    workers : list[int], optional
+        numbers of workers each measured apart for the solvers taking a
+        `workers` argument, by default their own default
+    log : bool, optional
+        print a summary of each combination once measured, by default True
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        every run, with the map, rule, solver, number of workers (None if not
+        set) and repetition it belongs to
+    """
+    runs = []
+    for path in maps:
+        for rule in rules:
+            for name in solvers:
+                if rule not in getattr(SOLVERS[name], "rules", (rule,)):
+                    continue
+                counts = [None]
+                if workers and "workers" in signature(SOLVERS[name]).parameters:
+                    counts = workers
+                for count in counts:
+                    options = {} if count is None else {"workers": count}
+                    measures = []
+                    for index in range(repeat):
+                        measures.append(
+                            {
+                                "map": path,
+                                "rule": rule,
+                                "solver": name,
+                                "workers": count,
+                                "repetition": index,
+                                **run(path, name, rule, timeout, trace, options),
+                            }
+                        )
+                        if measures[-1].get("timeout"):
+                            break  # the next repetitions would time out too
+                    runs.extend(measures)
+                    if log:
+                        print(format_summary(summarize(measures)[0]), flush=True)
+    return runs
+
+
+def mean(values: list[Optional[float]]) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return statistics.fmean(values) if values else None
+
+
+def summarize(runs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Aggregate the runs of each map, rule, solver and number of workers
+
+    Parameters
+    ----------
+    runs : list[dict[str, Any]]
+        runs returned by `benchmark`
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        one summary per combination, with the keys listed in `COLUMNS`
+    """
+    groups = {}
+    for measure in runs:
+        key = (
+            measure["map"],
+            measure["rule"],
+            measure["solver"],
+            measure.get("workers"),
+        )
+        groups.setdefault(key, []).append(measure)
+
+    res = []
+    for (path, rule, name, workers), measures in groups.items():
+        done = [m for m in measures if "timeout" not in m and "error" not in m]
+        times = [m["time"] for m in done]
+        rss = [m["peak_rss"] for m in done if m["peak_rss"] is not None]
+        traced = [m["tracemalloc_peak"] for m in done if m["tracemalloc_peak"]]
+        res.append(
+            {
+                "map": path,
+                "rule": rule,
+                "solver": name,
+                "workers": workers,
+                "runs": len(done),
+                "solved": bool(done) and done[0]["length"] is not None,
+                "length": done[0]["length"] if done else None,
+                "time_mean": mean(times),
+                "time_stdev": statistics.stdev(times) if len(times) > 1 else None,
+                "time_min": min(times, default=None),
+                "nodes": done[0]["nodes"] if done else None,
+                "nodes_per_second": mean([m["nodes_per_second"] for m in done]),
+                "frontier": done[0]["frontier"] if done else None,
+                "peak_rss": max(rss, default=None),
+                "tracemalloc_peak": max(traced, default=None),
+                "timeouts": sum(1 for m in measures if m.get("timeout")),
+                "errors": sorted({m["error"] for m in measures if "error" in m}),
+            }
+        )
+    return res
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    name = f"{Path(summary['map']).name} {summary['rule']} {summary['solver']}"
+    if summary["workers"] is not None:
+        name += f" ({summary['workers']} workers)"
+    if not summary["runs"]:
+        if summary["timeouts"]:
+            return f"{name}: timeout"
+        return f"{name}: error {summary['errors'][0]}"
+    stdev = summary["time_stdev"] or 0
+    return (
+        f"{name}: length {summary['length']}, "
+        f"{summary['time_mean']:.3f}s ± {stdev:.3f}s, "
+        f"{summary['nodes']} nodes, frontier {summary['frontier']}"
+    )
+
+
+def write_json(path: str, runs: list[dict[str, Any]]) -> None:
+    """Write the runs and their summaries to `path` as JSON"""
+    with open(path, "w", encoding="UTF-8") as file:
+        json.dump({"runs": runs, "summary": summarize(runs)}, file, indent=2)
+
+
+def write_csv(path: str, runs: list[dict[str, Any]]) -> None:
+    """Write the summaries of the runs to `path` as CSV, one line each"""
+    with open(path, "w", encoding="UTF-8", newline="") as file:
+        writer = csv.DictWriter(file, COLUMNS)
+        writer.writeheader()
+        for summary in summarize(runs):
+            writer.writerow({**summary, "errors": "; ".join(summary["errors"])})
@@ -4,17 +4,33 @@ Game's component must be created using both 'load_image' and 'load_board'
 static methods of class 'Board'
 """
 
-from typing import Iterator
+from hashlib import sha256
+from typing import NamedTuple, TYPE_CHECKING, Union
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
 from src.color import Color
-from lib.fltk import PhotoImage
+from src.png import PNGImage
+from src.settings import RRADIUS
+
+if TYPE_CHECKING:
+    from lib.fltk import PhotoImage
 
-__all__ = ["Cell", "Board"]
+__all__ = ["Cell", "Board", "VALID_TEXTURES"]
 
+VALID_TEXTURES = {Color.WHITE, Color.DARKCYAN, Color.GREY}  # drivable colors
 
-class Cell:
+
+class Cell(NamedTuple):
     """
-    Represent a coordinates on a two-dimension system
+    Represent a coordinates on a two-dimension system. Cells are immutable
+    tuples, so they are hashed, compared and ordered as their `(x, y)` pair
+    without calling Python code
 
     Attributes
     ----------
@@ -24,26 +40,11 @@ class Cell:
         ordinate of the represented coordinate
     """
 
-    def __init__(self, x: int, y: int) -> None:
-        """Constructor of the 'Cell' object
-
-        Parameters
-        ----------
-        x : int
-            abscissa of the represented coordinate
-        y: int
-            ordinate of the represented coordinate
-        """
-        self.x = x
-        self.y = y
-
-    def __add__(self, other) -> "Cell":
-        if isinstance(other, Cell):
-            return Cell(self.x + other.x, self.y + other.y)
-        raise NotImplementedError
+    x: int
+    y: int
 
-    def __iter__(self) -> Iterator[tuple[int, int]]:
-        return iter((self.x, self.y))
+    def __add__(self, other: "Cell") -> "Cell":
+        return Cell(self.x + other.x, self.y + other.y)
 
     def neighbour(self) -> set["Cell"]:
         """Return a set of all nearby cells
@@ -53,22 +54,8 @@ class Cell:
         set[Cell]
             Contains the cells arround
         """
-        return {self + c for c in neighbour}
-
-    def __lt__(self, other) -> bool:
-        if isinstance(other, Cell):
-            return (self.x, self.y) < (other.x, other.y)
-        if isinstance(other, tuple):
-            return (self.x, self.y) < other
-        raise NotImplementedError
-
-    def __eq__(self, other) -> bool:
-        if isinstance(other, Cell):
-            return self.x == other.x and self.y == other.y
-        return False
-
-    def __hash__(self) -> int:
-        return hash((self.x, self.y))
+        x, y = self
+        return {Cell(x + dx, y + dy) for dx, dy in NEIGHBOUR_OFFSETS}
 
     def __repr__(self) -> str:
         return f"Cell(x: {self.x}, y: {self.y})"
@@ -84,6 +71,11 @@ class Cell:
         return Cell(self.x, self.y)
 
 
+NEIGHBOUR_OFFSETS = tuple(  # arrounds coordinates of (0, 0), as plain pairs
+    (dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+)
+EMPTY = frozenset()
+
 neighbour = {  # set of arrounds coordinates of (0, 0)
     Cell(-1, -1),
     Cell(0, -1),
@@ -113,22 +105,95 @@ class Board:
     legal : set[Cell]
         set of coordintes where the player's car can go. This set contains also
         the start and end coordinates
-    image : PhotoImage, optional
+    image : PhotoImage | PNGImage, optional
         in case the game source file is an image, this attribute represent the
         image data, default = None
     padding : int, optional
         in case the game source file is an image, this attribute represent the
         padding of each block, default = 0
+    drivable : np.ndarray | list[bytearray], optional
+        in case the game source file is an image, tells for each pixel,
+        indexed by row then column, if its color is a valid texture. A boolean
+        array when NumPy is available, default = None
+    radius : float, optional
+        radius of the car in blocks, obstacles closer than `radius` to a move
+        make it illegal under the strict rule, default = RRADIUS
+    graph : StateGraph, optional
+        precompiled graph of the reachable states, used by solvers instead of
+        computing successors when set, default = None
+    segments : SegmentCache, optional
+        validity of the segments already checked under the strict rule,
+        created on first use, default = None
+    field : DistanceField, optional
+        distance from every point of the board to the nearest obstacle,
+        computed on first use, default = None
+    digest : str, optional
+        hash of the content the board was loaded from, identifying it in the
+        solution cache, default = None
+    finish : dict[Cell, int], optional
+        number of one-cell moves from every cell to the finish line through
+        the cells that moves allowed by the strict rule can cross, computed
+        on first use, default = None
+    neighbourhoods : dict[Cell, frozenset[Cell]], optional
+        legal cells around every cell next to a legal one, built on first use
+        of `successors` once the board is loaded, default = None
     """
 
-    def __init__(self, image: PhotoImage = None, padding: int = 0) -> None:
-        self.trajectory = []
+    def __init__(
+        self,
+        image: Union["PhotoImage", PNGImage] = None,
+        padding: int = 0,
+        radius: float = RRADIUS,
+    ) -> None:
+        self._trajectory = []
+        self._visited = set()
         self.start = set()
         self.end = set()
         self.obstacles = set()
         self.legal = set()
         self.image = image
         self.padding = padding
+        self.drivable = None
+        self.radius = radius
+        self.graph = None
+        self.segments = None
+        self.field = None
+        self.digest = None
+        self.finish = None
+        self.neighbourhoods = None
+
+    @property
+    def trajectory(self) -> list[Cell]:
+        return self._trajectory
+
+    @trajectory.setter
+    def trajectory(self, trajectory: list[Cell]) -> None:
+        self._trajectory = trajectory
+        self._visited = set(trajectory)
+
+    def successors(self, position: Cell, speed: Cell) -> frozenset[Cell]:
+        """Compute the legal coordinates reachable from `position` when the
+        car moves at `speed`, without checking for already visited cells.
+        The set is read from `neighbourhoods`, so nothing is allocated but the
+        coordinates looked up
+
+        Parameters
+        ----------
+        position : Cell
+            current position of the car
+        speed : Cell
+            current speed of the car
+
+        Returns
+        -------
+        frozenset[Cell]
+            set of possible next coordinates, shared by every call
+        """
+        if self.neighbourhoods is None:
+            self.neighbourhoods = neighbourhoods(self.legal)
+        # plain pairs are equal to the cells, and hash like them
+        target = (position.x + speed.x, position.y + speed.y)
+        return self.neighbourhoods.get(target, EMPTY)
 
     def next_coords(self, trajectory: list[Cell] = None) -> set[Cell]:
         """Compte the next coordinates based on the previous ones.
@@ -148,17 +213,17 @@ class Board:
             set of possible next coordinates
         """
         if trajectory is None:
-            trajectory = self.trajectory
+            trajectory, visited = self._trajectory, self._visited
+        else:
+            visited = set(trajectory)
 
-        targets = set()
         if not trajectory:
-            targets = self.start
-        elif len(trajectory) == 1:
-            targets = trajectory[-1].neighbour()
+            return self.start & self.legal
+        if len(trajectory) == 1:
+            targets = self.successors(trajectory[-1], Cell(0, 0))
         else:
-            vector = self.speed(trajectory)
-            targets = (trajectory[-1] + vector).neighbour()
-        return (targets & self.legal) - set(trajectory)
+            targets = self.successors(trajectory[-1], self.speed(trajectory))
+        return targets - visited
 
     def speed(self, trajectory: list[Cell] = None) -> Cell:
         if trajectory is None:
@@ -181,7 +246,8 @@ class Board:
         cell : Cell
             coordinate to the current trajectory
         """
-        self.trajectory.append(cell)
+        self._trajectory.append(cell)
+        self._visited.add(cell)
 
     def pop(self) -> Cell:
         """Remove the last inserted coordinate
@@ -191,8 +257,9 @@ class Board:
         Cell
             the last coordinate if trajectory isn't empty, else None
         """
-        if self.trajectory:
-            cell = self.trajectory.pop()
+        if self._trajectory:
+            cell = self._trajectory.pop()
+            self._visited.discard(cell)
             return cell
         return None
 
@@ -215,7 +282,9 @@ class Board:
         return len(trajectory) and trajectory[-1] in self.end
 
     @staticmethod
-    def load_board(board: list[str], block_size: int) -> "Board":
+    def load_board(
+        board: list[str], block_size: int, radius: float = RRADIUS
+    ) -> "Board":
         """Create a board object based on a list of strings
 
         Parameters
@@ -224,13 +293,15 @@ class Board:
             list of strings that codes the board
         block_size : int
             size of each block (only needed when displaying the board)
+        radius : float, optional
+            radius of the car in blocks, by default RRADIUS
 
         Returns
         -------
         Board
             created board
         """
-        res = Board(padding=block_size)
+        res = Board(padding=block_size, radius=radius)
         for y, line in enumerate(board):
             for x, char in enumerate(line):
                 if char == ">":
@@ -241,36 +312,102 @@ class Board:
                     res.obstacles.add(Cell(x, y))
                 if char != "#":
                     res.legal.add(Cell(x, y))
+        res.digest = sha256("\n".join(board).encode()).hexdigest()
         return res
 
     @staticmethod
-    def load_image(image: PhotoImage, spacing: int) -> "Board":
+    def load_image(
+        image: Union["PhotoImage", PNGImage], spacing: int, radius: float = 0
+    ) -> "Board":
         """Create a board object based on an image
 
         Parameters
         ----------
-        image : PhotoImage
-            given image
+        image : PhotoImage | PNGImage
+            given image, `PNGImage` being used when Tk is not available
         spacing : int
             space between each coordinates
+        radius : float, optional
+            radius of the car in blocks, by default 0 (the car only needs the
+            pixels it goes through to be valid)
 
         Returns
         -------
         Board
             created board
         """
-        res = Board(image, padding=spacing)
+        res = Board(image, padding=spacing, radius=radius)
+        colors = pixels(image)
+        white, darkcyan = Color.WHITE.hex(), Color.DARKCYAN.hex()
+        grey = Color.GREY.hex()
         for y in range(image.height() // spacing):
+            row = colors[y * spacing]
             for x in range(image.width() // spacing):
-                color = image.get(x * spacing, y * spacing)
+                color = row[x * spacing]
                 cell = Cell(x, y)
 
-                if color == Color.WHITE:
+                if color == white:
                     res.legal.add(cell)
-                elif color == Color.DARKCYAN:
+                elif color == darkcyan:
                     res.start.add(cell)
                     res.legal.add(cell)
-                elif color == Color.GREY:
+                elif color == grey:
                     res.end.add(cell)
                     res.legal.add(cell)
+
+        content = sha256(f"{spacing}\n".encode())
+        for row in colors:
+            content.update("".join(row).encode())
+        res.digest = content.hexdigest()
+
+        valid = {color.hex() for color in VALID_TEXTURES}
+        if NUMPY_AVAILABLE:
+            res.drivable = np.isin(np.array(colors), list(valid))
+        else:
+            res.drivable = [
+                bytearray(color in valid for color in row) for row in colors
+            ]
         return res
+
+
+def neighbourhoods(legal: set[Cell]) -> dict[Cell, frozenset[Cell]]:
+    """Map every cell next to a legal cell, or legal itself, to the legal
+    cells around it, itself included
+
+    Parameters
+    ----------
+    legal : set[Cell]
+        legal cells of a board
+
+    Returns
+    -------
+    dict[Cell, frozenset[Cell]]
+        legal neighbourhood of each cell, cells without legal neighbour
+        being absent
+    """
+    res = {}
+    for cell in legal:
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            res.setdefault(Cell(cell.x + dx, cell.y + dy), []).append(cell)
+    return {center: frozenset(cells) for center, cells in res.items()}
+
+
+def pixels(image: Union["PhotoImage", PNGImage]) -> list[list[str]]:
+    """Get the color of every pixel of `image` as '#rrggbb' strings, indexed
+    by row then column. Tk images are read in a single call instead of one
+    call per pixel
+
+    Parameters
+    ----------
+    image : PhotoImage | PNGImage
+        given image
+
+    Returns
+    -------
+    list[list[str]]
+        rows of pixel colors
+    """
+    if isinstance(image, PNGImage):
+        return image.colors()
+    rows = image.tk.splitlist(image.tk.call(image.name, "data"))
+    return [list(image.tk.splitlist(row)) for row in rows]
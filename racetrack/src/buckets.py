@@ -0,0 +1,139 @@
+"""Contains the open lists shared by the informed solvers
+
+`BucketQueue` is a monotone bucket queue: items are stored in an array of
+buckets indexed by their integer priority, and a cursor moves up to the lowest
+bucket holding an item. A* with a consistent heuristic never pushes below the
+priority it pops, so the cursor only moves forward and every operation is
+amortized constant time. Nodes are never compared to each other: ties are
+broken by the order of insertion, first in first out or last in first out.
+
+`HeapQueue` keeps priorities of any kind in a heap, for the searches whose
+priorities are not small integers such as distances or weighted costs.
+"""
+
+from collections import deque
+from heapq import heappush, heappop
+from itertools import count
+from typing import Any, Iterator
+
+__all__ = ["BucketQueue", "HeapQueue"]
+
+
+class BucketQueue:
+    """Priority queue of non-negative integer priorities popping the item of
+    lowest priority, ties being broken by insertion order
+
+    Attributes
+    ----------
+    lifo : bool
+        True if the last item pushed among equal priorities is popped first,
+        else the first one
+    buckets : list[deque]
+        items waiting, by priority
+    low : int
+        priority at most equal to the lowest waiting one, where the search
+        for the next item starts
+    size : int
+        number of items waiting
+    """
+
+    __slots__ = ("lifo", "buckets", "low", "size")
+
+    def __init__(self, lifo: bool = False) -> None:
+        """Constructor of the 'BucketQueue' object
+
+        Parameters
+        ----------
+        lifo : bool, optional
+            pop the last item pushed among equal priorities first, by default
+            False
+        """
+        self.lifo = lifo
+        self.buckets = []
+        self.low = 0
+        self.size = 0
+
+    def push(self, priority: int, item: Any) -> None:
+        """Add `item` with `priority`, a non-negative integer. Pushing below
+        the last priority popped is allowed but moves the cursor back"""
+        buckets = self.buckets
+        while len(buckets) <= priority:
+            buckets.append(deque())
+        buckets[priority].append(item)
+        if priority < self.low:
+            self.low = priority
+        self.size += 1
+
+    def lowest(self) -> deque:
+        """Move the cursor to the lowest non-empty bucket and return it, the
+        queue must not be empty"""
+        buckets, low = self.buckets, self.low
+        while not buckets[low]:
+            low += 1
+        self.low = low
+        return buckets[low]
+
+    def pop(self) -> Any:
+        """Remove and return an item of lowest priority, the queue must not
+        be empty"""
+        bucket = self.lowest()
+        self.size -= 1
+        return bucket.pop() if self.lifo else bucket.popleft()
+
+    def peek(self) -> tuple[int, Any]:
+        """Priority and item that `pop` would return, the queue must not be
+        empty"""
+        bucket = self.lowest()
+        return self.low, bucket[-1] if self.lifo else bucket[0]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[tuple[int, Any]]:
+        """Every waiting item with its priority, in no particular order"""
+        for priority in range(self.low, len(self.buckets)):
+            for item in self.buckets[priority]:
+                yield priority, item
+
+
+class HeapQueue:
+    """Priority queue popping the item of lowest priority, ties being broken
+    by insertion order, first in first out
+
+    Attributes
+    ----------
+    heap : list[tuple]
+        heap of the waiting items, as (priority, insertion number, item)
+    counter : Iterator[int]
+        insertion numbers
+    """
+
+    __slots__ = ("heap", "counter")
+
+    def __init__(self) -> None:
+        self.heap = []
+        self.counter = count()
+
+    def push(self, priority: Any, item: Any) -> None:
+        """Add `item` with `priority`, any value comparable to the other
+        priorities such as a number or a tuple of numbers"""
+        heappush(self.heap, (priority, next(self.counter), item))
+
+    def pop(self) -> Any:
+        """Remove and return an item of lowest priority, the queue must not
+        be empty"""
+        return heappop(self.heap)[2]
+
+    def peek(self) -> tuple[Any, Any]:
+        """Priority and item that `pop` would return, the queue must not be
+        empty"""
+        priority, _, item = self.heap[0]
+        return priority, item
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __iter__(self) -> Iterator[tuple[Any, Any]]:
+        """Every waiting item with its priority, in no particular order"""
+        for priority, _, item in self.heap:
+            yield priority, item
@@ -0,0 +1,263 @@
+"""Contains the on-disk cache of the results of searches
+
+Every result is stored in its own JSON file, named after a hash of the content
+the board was loaded from, the rule, the radius of the car and the solver with
+its options, so an unchanged track is never solved twice with the same
+settings. Once the files exceed the size of the cache, the least recently used
+ones are removed. A cached trajectory is checked against the board before
+being returned.
+"""
+
+import json
+import os
+from hashlib import sha256
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import Any, Optional
+
+from src.board import Cell, Board
+from src.settings import LAX_RULE, SOLUTION_CACHE_DIRECTORY, SOLUTION_CACHE_SIZE
+from src.stats import SearchStats, SolveResult
+from src.tools import filter_positions
+
+__all__ = ["SolutionCache", "valid_trajectory"]
+
+VERSION = 1  # format of the entries, part of their keys
+
+
+def valid_trajectory(board: Board, trajectory: list[Cell], rule: str) -> bool:
+    """Check that `trajectory` goes from a start to an end of `board` with
+    moves allowed by `rule`, never going twice through the same cell
+
+    Parameters
+    ----------
+    board : Board
+        board the trajectory is driven on
+    trajectory : list[Cell]
+        positions of the car
+    rule : str
+        type of rule to apply to movements (`LAX_RULE` or `STRICT_RULE`)
+
+    Returns
+    -------
+    bool
+        True if every move of the trajectory is legal, else False
+    """
+    if not trajectory or trajectory[0] not in board.start:
+        return False
+    if len(set(trajectory)) != len(trajectory):
+        return False
+    if trajectory[-1] not in board.end:
+        return False
+    speed = Cell(0, 0)
+    for origin, target in zip(trajectory, trajectory[1:]):
+        if target not in board.successors(origin, speed):
+            return False
+        if rule != LAX_RULE and not filter_positions(board, {target}, origin):
+            return False
+        speed = Cell(target.x - origin.x, target.y - origin.y)
+    return True
+
+
+def option_value(value: Any) -> Any:
+    # heuristics are given as classes
+    return getattr(value, "__name__", value)
+
+
+class SolutionCache:
+    """Results of searches stored in a directory
+
+    Attributes
+    ----------
+    directory : str
+        directory holding one file per result
+    size : int
+        maximum number of bytes of the files, the least recently used ones
+        being removed beyond it
+    """
+
+    def __init__(
+        self,
+        directory: str = SOLUTION_CACHE_DIRECTORY,
+        size: int = SOLUTION_CACHE_SIZE,
+    ) -> None:
+        self.directory = directory
+        self.size = size
+
+    def key(
+        self, board: Board, solver: str, rule: str, options: dict[str, Any]
+    ) -> Optional[str]:
+        """Hash identifying a search, None if the content of the board is
+        unknown"""
+        if board.digest is None:
+            return None
+        settings = {name: option_value(value) for name, value in options.items()}
+        content = json.dumps(
+            [VERSION, board.digest, rule, board.radius, solver, settings],
+            sort_keys=True,
+        )
+        return sha256(content.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(
+        self, board: Board, solver: str, rule: str, options: dict[str, Any]
+    ) -> Optional[SolveResult]:
+        """Result of a previous search of `board`, set as the trajectory of
+        the board if there is a solution
+
+        Parameters
+        ----------
+        board : Board
+            board to solve
+        solver : str
+            name of the solver
+        rule : str
+            type of rule to apply to movements (`LAX_RULE` or `STRICT_RULE`)
+        options : dict[str, Any]
+            options given to the solver
+
+        Returns
+        -------
+        SolveResult
+            cached result, None if there is none or if its trajectory is not
+            valid on `board`
+        """
+        start = time()
+        key = self.key(board, solver, rule, options)
+        if key is None:
+            return None
+        try:
+            with open(self.path(key), "r", encoding="UTF-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        trajectory = entry["trajectory"]
+        if trajectory is not None:
+            trajectory = [Cell(x, y) for x, y in trajectory]
+            if not valid_trajectory(board, trajectory, rule):
+                self.remove(key)
+                return None
+            board.trajectory = trajectory
+        try:
+            os.utime(self.path(key))  # most recently used
+        except OSError:
+            pass
+
+        stats = SearchStats()
+        stats.optimal = entry["optimal"]
+        return SolveResult(
+            solver, rule, trajectory, time() - start, 0, stats, cached=True
+        )
+
+    def put(self, board: Board, result: SolveResult, options: dict[str, Any]):
+        """Store `result`, found by a search of `board`, then remove the least
+        recently used results if the cache is full"""
+        key = self.key(board, result.solver, result.rule, options)
+        if key is None or result.cached or result.interrupted:
+            return
+        entry = {
+            "version": VERSION,
+            "board": board.digest,
+            "solver": result.solver,
+            "rule": result.rule,
+            "radius": board.radius,
+            "options": {name: option_value(value) for name, value in options.items()},
+            "trajectory": None,
+            "optimal": result.optimal,
+            "time": result.time,
+            "created": time(),
+        }
+        if result.trajectory is not None:
+            entry["trajectory"] = [list(cell) for cell in result.trajectory]
+
+        os.makedirs(self.directory, exist_ok=True)
+        # written aside then renamed, so readers never see a partial file
+        with NamedTemporaryFile(
+            "w", encoding="UTF-8", dir=self.directory, suffix=".tmp", delete=False
+        ) as file:
+            json.dump(entry, file)
+        os.replace(file.name, self.path(key))
+        self.evict()
+
+    def remove(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def files(self) -> list[tuple[str, os.stat_result]]:
+        """Keys and status of the files of the results, from the least to the
+        most recently used"""
+        res = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        res.append((entry.name[: -len(".json")], entry.stat()))
+                    except OSError:  # removed by another process meanwhile
+                        pass
+        except OSError:
+            return []
+        res.sort(key=lambda file: file[1].st_mtime)
+        return res
+
+    def evict(self) -> None:
+        """Remove the least recently used results until the cache fits in its
+        size"""
+        files = self.files()
+        total = sum(status.st_size for _, status in files)
+        for key, status in files:
+            if total <= self.size:
+                break
+            total -= status.st_size
+            self.remove(key)
+
+    def entries(self) -> list[dict[str, Any]]:
+        """Description of every cached result, from the least to the most
+        recently used
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            key, solver, rule, options, solution length, duration of the
+            search, size of the file and time of last use of each result
+        """
+        res = []
+        for key, status in self.files():
+            try:
+                with open(self.path(key), "r", encoding="UTF-8") as file:
+                    content = json.load(file)
+            except (OSError, ValueError):
+                continue
+            trajectory = content.get("trajectory")
+            res.append(
+                {
+                    "key": key,
+                    "solver": content.get("solver"),
+                    "rule": content.get("rule"),
+                    "options": content.get("options"),
+                    "length": len(trajectory) if trajectory is not None else None,
+                    "time": content.get("time"),
+                    "size": status.st_size,
+                    "used": status.st_mtime,
+                }
+            )
+        return res
+
+    def clear(self) -> int:
+        """Remove every cached result
+
+        Returns
+        -------
+        int
+            number of results removed
+        """
+        files = self.files()
+        for key, _ in files:
+            self.remove(key)
+        return len(files)
@@ -0,0 +1,285 @@
+"""Contains the distance field used to check if the car can follow a segment
+
+Obstacles are points of a grid: the wall cells of text-based maps, or the
+pixels that are not a valid texture on image-based maps. The euclidean
+distance from every point of the grid to the nearest obstacle is computed once
+per board. Segments are then checked by sphere tracing: the car moves along
+the segment by the free distance around it, and only the few obstacles close
+to the car are tested exactly. The cost of a check depends on the length of
+the segment, not on the number of obstacles.
+
+When NumPy is available, fields of image-based boards are computed on arrays
+and many segments can be traced at once.
+"""
+
+from math import ceil, floor, hypot, sqrt
+from typing import Sequence, Union
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+__all__ = ["DistanceField"]
+
+FAR = 1e20  # squared distance standing for "no obstacle"
+MAX_CLEARANCE = 32  # distances computed with NumPy are clamped to this value
+
+
+def squared_distances(values: list[float]) -> list[float]:
+    """One dimensional squared euclidean distance transform (Felzenszwalb and
+    Huttenlocher): `res[q] = min(values[p] + (q - p)^2)` for every `p`"""
+    size = len(values)
+    if not size:
+        return []
+    parabolas = [0] * size
+    bounds = [0.0] * (size + 1)
+    bounds[0], bounds[1] = -FAR, FAR
+    k = 0
+    for q in range(1, size):
+        while True:
+            p = parabolas[k]
+            s = ((values[q] + q * q) - (values[p] + p * p)) / (2 * q - 2 * p)
+            if s > bounds[k] or k == 0:
+                break
+            k -= 1
+        if s <= bounds[k]:
+            parabolas[0] = q
+            bounds[1] = FAR
+            continue
+        k += 1
+        parabolas[k] = q
+        bounds[k] = s
+        bounds[k + 1] = FAR
+
+    res = [0.0] * size
+    k = 0
+    for q in range(size):
+        while bounds[k + 1] < q:
+            k += 1
+        p = parabolas[k]
+        res[q] = (q - p) * (q - p) + values[p]
+    return res
+
+
+def capped_distances(obstacles: "np.ndarray", cap: int) -> "np.ndarray":
+    """Distance from every point of `obstacles` to the nearest obstacle, exact
+    up to `cap` and clamped to `cap` beyond, which keeps it a lower bound"""
+    vertical = np.where(obstacles, 0.0, np.inf)
+    for offset in range(1, cap + 1):
+        steps = np.where(obstacles[:-offset], float(offset), np.inf)
+        np.minimum(vertical[offset:], steps, out=vertical[offset:])
+        steps = np.where(obstacles[offset:], float(offset), np.inf)
+        np.minimum(vertical[:-offset], steps, out=vertical[:-offset])
+
+    vertical *= vertical
+    squares = vertical.copy()
+    for offset in range(1, cap + 1):
+        shifted = vertical[:, :-offset] + offset * offset
+        np.minimum(squares[:, offset:], shifted, out=squares[:, offset:])
+        shifted = vertical[:, offset:] + offset * offset
+        np.minimum(squares[:, :-offset], shifted, out=squares[:, :-offset])
+    return np.minimum(np.sqrt(squares), cap)
+
+
+def segment_distance(
+    x: float, y: float, ax: float, ay: float, bx: float, by: float
+) -> float:
+    """Distance from point (x, y) to segment (ax, ay) - (bx, by)"""
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    t = 0 if not length else max(0, min(1, ((x - ax) * dx + (y - ay) * dy) / length))
+    return hypot(x - ax - t * dx, y - ay - t * dy)
+
+
+class DistanceField:
+    """Euclidean distance from every point of a grid to the nearest obstacle
+
+    Attributes
+    ----------
+    width : int
+        number of columns of the grid
+    height : int
+        number of rows of the grid
+    obstacles : list[bytearray] | np.ndarray
+        obstacles of the grid, indexed by row then column
+    distances : list[list[float]] | np.ndarray
+        distance to the nearest obstacle, indexed by row then column. Clamped
+        to MAX_CLEARANCE when computed with NumPy
+    vectorized : bool
+        True if the field is stored in NumPy arrays
+    """
+
+    def __init__(self, obstacles: Union[list[bytearray], "np.ndarray"]) -> None:
+        """Constructor of the 'DistanceField' object
+
+        Parameters
+        ----------
+        obstacles : list[bytearray] | np.ndarray
+            rows of the grid, non zero values being obstacles. The field is
+            computed with NumPy when given a boolean array
+        """
+        self.vectorized = NUMPY_AVAILABLE and isinstance(obstacles, np.ndarray)
+        if self.vectorized:
+            self.height, self.width = obstacles.shape
+            self.obstacles = obstacles
+            self.distances = capped_distances(obstacles, MAX_CLEARANCE)
+            return
+
+        self.height = len(obstacles)
+        self.width = len(obstacles[0]) if obstacles else 0
+        self.obstacles = obstacles
+
+        columns = [
+            squared_distances([0.0 if row[x] else FAR for row in obstacles])
+            for x in range(self.width)
+        ]
+        self.distances = [
+            [sqrt(value) for value in squared_distances(list(row))]
+            for row in zip(*columns)
+        ]
+
+    def clearance(self, x: float, y: float) -> float:
+        """Lower bound of the distance from (x, y) to the nearest obstacle"""
+        cx = min(max(round(x), 0), self.width - 1)
+        cy = min(max(round(y), 0), self.height - 1)
+        return self.distances[cy][cx] - hypot(x - cx, y - cy)
+
+    def collides(
+        self,
+        x: float,
+        y: float,
+        reach: float,
+        segment: tuple[float, float, float, float],
+        radius: float,
+    ) -> bool:
+        """Check if an obstacle at most `reach` away from (x, y) is at most
+        `radius` away from `segment`"""
+        left, right = max(ceil(x - reach), 0), min(floor(x + reach), self.width - 1)
+        top, bottom = max(ceil(y - reach), 0), min(floor(y + reach), self.height - 1)
+        for cy in range(top, bottom + 1):
+            row = self.obstacles[cy]
+            for cx in range(left, right + 1):
+                if row[cx] and segment_distance(cx, cy, *segment) <= radius:
+                    return True
+        return False
+
+    def segment_clear(
+        self, ax: float, ay: float, bx: float, by: float, radius: float
+    ) -> bool:
+        """Check if a disk of `radius` can follow the segment (ax, ay) - (bx, by)
+        without touching any obstacle
+
+        Parameters
+        ----------
+        ax : float
+            abscissa of the start of the segment
+        ay : float
+            ordinate of the start of the segment
+        bx : float
+            abscissa of the end of the segment
+        by : float
+            ordinate of the end of the segment
+        radius : float
+            radius of the disk
+
+        Returns
+        -------
+        bool
+            True if no obstacle is at most `radius` away from the segment
+        """
+        segment = (ax, ay, bx, by)
+        length = hypot(bx - ax, by - ay)
+        ux, uy = ((bx - ax) / length, (by - ay) / length) if length else (0, 0)
+        t = 0.0
+        while True:
+            x, y = ax + ux * t, ay + uy * t
+            step = self.clearance(x, y) - radius
+            if step < 1:
+                # obstacles close to the car are checked against the whole
+                # segment, which makes the next unit of the segment safe
+                if self.collides(x, y, radius + 1, segment, radius):
+                    return False
+                step = 1
+            if t >= length:
+                return True
+            t = min(t + step, length)
+
+    def segments_clear(
+        self,
+        ax: float,
+        ay: float,
+        targets: Sequence[tuple[float, float]],
+        radius: float,
+    ) -> list[bool]:
+        """Check the segments from (ax, ay) to every point of `targets`, like
+        `segment_clear`. Vectorized fields trace all the segments at once
+
+        Parameters
+        ----------
+        ax : float
+            abscissa of the start of the segments
+        ay : float
+            ordinate of the start of the segments
+        targets : Sequence[tuple[float, float]]
+            ends of the segments
+        radius : float
+            radius of the disk
+
+        Returns
+        -------
+        list[bool]
+            for each target, True if no obstacle is at most `radius` away from
+            the segment
+        """
+        if not self.vectorized:
+            return [self.segment_clear(ax, ay, bx, by, radius) for bx, by in targets]
+        if not targets:
+            return []
+
+        ends = np.asarray(targets, dtype=float)
+        bx, by = ends[:, 0], ends[:, 1]
+        length = np.hypot(bx - ax, by - ay)
+        ux = np.divide(bx - ax, length, out=np.zeros_like(length), where=length > 0)
+        uy = np.divide(by - ay, length, out=np.zeros_like(length), where=length > 0)
+        reach = ceil(radius + 1)
+        window = np.arange(-reach, reach + 2)
+        wx, wy = (axis.ravel() for axis in np.meshgrid(window, window))
+
+        t = np.zeros(len(ends))
+        clear = np.ones(len(ends), dtype=bool)
+        active = np.arange(len(ends))
+        while active.size:
+            x, y = ax + ux[active] * t[active], ay + uy[active] * t[active]
+            cx = np.clip(np.rint(x), 0, self.width - 1).astype(int)
+            cy = np.clip(np.rint(y), 0, self.height - 1).astype(int)
+            step = self.distances[cy, cx] - np.hypot(x - cx, y - cy) - radius
+
+            near = np.flatnonzero(step < 1)
+            if near.size:
+                # every obstacle of a window around the car is checked against
+                # the whole segment, as done by `collides`
+                ox = np.clip(np.floor(x[near])[:, None] + wx, 0, self.width - 1)
+                oy = np.clip(np.floor(y[near])[:, None] + wy, 0, self.height - 1)
+                ox, oy = ox.astype(int), oy.astype(int)
+                segment = active[near]
+                dx, dy = (bx - ax)[segment, None], (by - ay)[segment, None]
+                squares = dx * dx + dy * dy
+                projection = np.divide(
+                    (ox - ax) * dx + (oy - ay) * dy,
+                    squares,
+                    out=np.zeros(ox.shape),
+                    where=squares > 0,
+                )
+                projection = np.clip(projection, 0, 1)
+                gaps = np.hypot(ox - ax - projection * dx, oy - ay - projection * dy)
+                hits = (self.obstacles[oy, ox] & (gaps <= radius)).any(axis=1)
+                clear[segment[hits]] = False
+                step[near] = 1
+
+            finished = (t[active] >= length[active]) | ~clear[active]
+            t[active] = np.minimum(t[active] + step, length[active])
+            active = active[~finished]
+        return clear.tolist()
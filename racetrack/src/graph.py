@@ -0,0 +1,315 @@
+"""Contains the precompiled graph of the states reachable on a board
+
+The graph is enumerated once for a map, a rule, a block size and a car radius,
+then stored next to the map in compressed sparse row (CSR) form:
+
+- `keys`: packed (x, y, vx, vy) of every state, sorted
+- `indptr`: successors of state `i` are `indices[indptr[i]:indptr[i + 1]]`
+- `cells`: packed (x, y) of every position of a state, sorted
+- `indices`: index of each successor in `keys`
+- `places`: index of the position of each successor in `cells`
+
+The header holds the digest of the board, so a graph is rebuilt whenever the
+map it was computed from changes. Later runs memory-map the file, so
+successors are read straight from the disk cache instead of being computed
+again with the legality checks of the rule: the successors of a state and
+their positions are slices of `indices` and `places`, only `cells` being
+unpacked when the graph is loaded, and solvers follow the indexes of the
+states from a move to the next.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Optional, Sequence
+
+from src.board import Cell, Board
+from src.settings import LAX_RULE
+from src.tools import filter_positions
+
+__all__ = ["StateGraph"]
+
+MAGIC = b"RTG2"
+HEADER = struct.Struct("<4sIQQQ64s")  # magic, padding, states, edges, cells, digest
+OFFSET = 1 << 15  # stored speeds are shifted to be positive
+
+
+def pack(position: Cell, speed: Cell) -> int:
+    return (
+        position.x << 48
+        | position.y << 32
+        | (speed.x + OFFSET) << 16
+        | (speed.y + OFFSET)
+    )
+
+
+class StateGraph:
+    """Graph of the (position, speed) states reachable from the starting line
+
+    Attributes
+    ----------
+    rule : str
+        rule used to compute the successors
+    path : str
+        file the graph is stored in, None if it was never saved
+    keys : Sequence[int]
+        sorted packed states
+    indptr : Sequence[int]
+        start of the successors of each state in `indices`
+    indices : Sequence[int]
+        successors of every state, as indexes in `keys`
+    places : Sequence[int]
+        position of every successor in `indices`, as indexes in `cells`
+    cells : Sequence[int]
+        sorted packed positions of the states
+    positions : list[Cell]
+        unpacked `cells`
+    digest : str
+        digest of the board the graph was computed on, empty if unknown
+    last : tuple[int, Sequence[int], tuple[Cell, ...]]
+        last state looked up by `child`, with its successors and their
+        positions
+    """
+
+    def __init__(
+        self,
+        rule: str,
+        keys: array,
+        indptr: array,
+        indices: array,
+        places: array,
+        cells: array,
+        digest: str = "",
+        path: str = None,
+    ) -> None:
+        self.rule = rule
+        self.keys = keys
+        self.indptr = indptr
+        self.indices = indices
+        self.places = places
+        self.cells = cells
+        self.positions = [Cell(cell >> 16, cell & 0xFFFF) for cell in cells]
+        self.digest = digest
+        self.path = path
+        self.last = (None, (), ())
+
+    def index(self, position: Cell, speed: Cell) -> Optional[int]:
+        """Find the index of a state
+
+        Parameters
+        ----------
+        position : Cell
+            position of the car
+        speed : Cell
+            speed of the car
+
+        Returns
+        -------
+        int
+            index of the state, None if it is not reachable
+        """
+        key = pack(position, speed)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index
+        return None
+
+    def targets(self, index: int) -> Sequence[int]:
+        """Indexes of the states reachable in one move from state `index`,
+        read straight from the CSR arrays"""
+        return self.indices[self.indptr[index] : self.indptr[index + 1]]
+
+    def moves(self, index: int) -> tuple[Cell, ...]:
+        """Positions reachable in one move from state `index`, in the order of
+        `targets(index)`"""
+        places = self.places[self.indptr[index] : self.indptr[index + 1]]
+        return tuple(map(self.positions.__getitem__, places))
+
+    def child(self, index: int, position: Cell) -> int:
+        """Index of the state reached by moving from state `index` to
+        `position`, one of `moves(index)`. The successors of the last state
+        asked for are kept, as siblings tend to be expanded one after the
+        other"""
+        if self.last[0] != index:
+            self.last = (index, self.targets(index), self.moves(index))
+        _, targets, moves = self.last
+        return targets[moves.index(position)]
+
+    def successors(self, position: Cell, speed: Cell) -> tuple[Cell, ...]:
+        """Positions reachable in one move from a state
+
+        Parameters
+        ----------
+        position : Cell
+            position of the car
+        speed : Cell
+            speed of the car
+
+        Returns
+        -------
+        tuple[Cell, ...]
+            next positions, each listed once, empty if the state is not
+            reachable
+        """
+        index = self.index(position, speed)
+        return () if index is None else self.moves(index)
+
+    def has_edge(self, source: tuple[Cell, Cell], target: tuple[Cell, Cell]) -> bool:
+        """Check if a move leads from state `source` to state `target`"""
+        index, goal = self.index(*source), self.index(*target)
+        if index is None or goal is None:
+            return False
+        return goal in self.targets(index)
+
+    @staticmethod
+    def build(board: Board, rule: str) -> "StateGraph":
+        """Enumerate every state reachable from the starting line of `board`.
+        Finish states are not expanded, and moves keeping the car on the same
+        cell are left out
+
+        Parameters
+        ----------
+        board : Board
+            board to explore
+        rule : str
+            type of rule to apply to movements (`LAX_RULE` or `STRICT_RULE`)
+
+        Returns
+        -------
+        StateGraph
+            created graph
+        """
+        edges = {}
+        queue = deque((start, Cell(0, 0)) for start in board.start)
+        seen = set(queue)
+        while queue:
+            position, speed = queue.popleft()
+            targets = []
+            if position not in board.end:
+                coords = board.successors(position, speed) - {position}
+                if rule != LAX_RULE:
+                    coords = filter_positions(board, coords, position)
+                for coord in coords:
+                    state = (coord, Cell(coord.x - position.x, coord.y - position.y))
+                    targets.append(state)
+                    if state not in seen:
+                        seen.add(state)
+                        queue.append(state)
+            edges[pack(position, speed)] = [pack(*state) for state in targets]
+
+        keys = array("q", sorted(edges))
+        cells = array("q", sorted({key >> 32 for key in keys}))
+        ids = {key: index for index, key in enumerate(keys)}
+        numbers = {cell: number for number, cell in enumerate(cells)}
+        indptr, indices, places = array("q", [0]), array("i"), array("i")
+        for key in keys:
+            targets = sorted(edges[key])  # same order as their indexes
+            indices.extend(ids[target] for target in targets)
+            places.extend(numbers[target >> 32] for target in targets)
+            indptr.append(len(indices))
+        return StateGraph(
+            rule, keys, indptr, indices, places, cells, board.digest or ""
+        )
+
+    def save(self, path: str, padding: int) -> None:
+        """Write the graph to `path`
+
+        Parameters
+        ----------
+        path : str
+            destination file
+        padding : int
+            block size of the board the graph was computed on
+        """
+        sizes = (len(self.keys), len(self.indices), len(self.cells))
+        header = HEADER.pack(MAGIC, padding, *sizes, self.digest.encode())
+        with open(path, "wb") as file:
+            file.write(header)
+            # 8-byte arrays first, so every array stays aligned
+            for values in (self.keys, self.indptr, self.cells):
+                file.write(values)
+            for values in (self.indices, self.places):
+                file.write(values)
+        self.path = path
+
+    @staticmethod
+    def load(path: str, rule: str) -> "StateGraph":
+        """Memory-map a graph written by `save`
+
+        Parameters
+        ----------
+        path : str
+            file to read
+        rule : str
+            rule the graph was computed with
+
+        Returns
+        -------
+        StateGraph
+            loaded graph
+        """
+        with open(path, "rb") as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path} is not a state graph")
+        magic, _, states, edges, cells, digest = HEADER.unpack_from(data)
+        size = HEADER.size + 8 * (2 * states + 1 + cells) + 8 * edges
+        if magic != MAGIC or len(data) != size:
+            raise ValueError(f"{path} is not a state graph")
+        view = memoryview(data)
+        start = HEADER.size
+        keys = view[start : start + 8 * states].cast("q")
+        start += 8 * states
+        indptr = view[start : start + 8 * (states + 1)].cast("q")
+        start += 8 * (states + 1)
+        cells = view[start : start + 8 * cells].cast("q")
+        start += 8 * len(cells)
+        indices = view[start : start + 4 * edges].cast("i")
+        start += 4 * edges
+        places = view[start : start + 4 * edges].cast("i")
+        digest = digest.rstrip(b"\0").decode()
+        return StateGraph(rule, keys, indptr, indices, places, cells, digest, path)
+
+    @staticmethod
+    def open(map_path: str, board: Board, rule: str) -> "StateGraph":
+        """Load the graph stored next to `map_path`, building and saving it
+        first if it is missing, written in an older format or computed on a
+        board whose digest differs from the one of `board`. Boards without a
+        digest always get a fresh graph
+
+        Parameters
+        ----------
+        map_path : str
+            path of the map the board was loaded from
+        board : Board
+            loaded board
+        rule : str
+            type of rule to apply to movements (`LAX_RULE` or `STRICT_RULE`)
+
+        Returns
+        -------
+        StateGraph
+            graph of the board
+        """
+        path = f"{map_path}.{board.padding}.{board.radius:g}.{rule}.graph"
+        if os.path.exists(path) and board.digest:
+            try:
+                graph = StateGraph.load(path, rule)
+            except ValueError:
+                graph = None
+            if graph is not None and graph.digest == board.digest:
+                return graph
+        StateGraph.build(board, rule).save(path, board.padding)
+        return StateGraph.load(path, rule)
+
+    def __reduce__(self):
+        if self.path is None:
+            arrays = (self.keys, self.indptr, self.indices, self.places, self.cells)
+            return (StateGraph, (self.rule, *arrays, self.digest))
+        return (StateGraph.load, (self.path, self.rule))
+
+    def __len__(self) -> int:
+        return len(self.keys)
@@ -1,30 +1,54 @@
 """Contains functions to handle graphic representation of board, including
 display of trajectories and event management.
+
+The window shows the board through `view`, panned with the arrow keys and
+zoomed with plus and minus. Drawing functions take board coordinates and skip
+what lies outside the window. Everything drawn for more than one frame
+watches the viewport to be drawn again when it moves.
 """
 
+import os
+from tempfile import TemporaryDirectory
+from typing import Callable, Optional
+
 from lib import fltk
 from src.board import Cell, Board
 from src.color import Color
-from src.settings import RRADIUS, PRADIUS
+from src.heatmap import Heatmap
+from src.raster import BoardTiles, ImageTiles, Tiles
+from src.settings import RRADIUS, PRADIUS, PAN_STEP, TILE_SIZE, WINDOW_SIZE
 from src.tools import distance
+from src.viewport import Viewport
 
 __all__ = [
     "draw_board",
     "draw_grid",
+    "draw_board_background",
+    "navigate",
     "wait_event",
     "wait_exit",
     "draw_trajectory",
+    "draw_solution",
+    "TrajectoryRenderer",
+    "HeatmapOverlay",
     "create_window_board",
     "create_window_image",
 ]
 
 COLORS = {"#": "green", ">": "darkcyan", "*": "grey"}
+PAN_KEYS = {"Left": (-1, 0), "Right": (1, 0), "Up": (0, -1), "Down": (0, 1)}
+ZOOM_KEYS = {"plus": 1, "equal": 1, "KP_Add": 1, "minus": -1, "KP_Subtract": -1}
 
 GRADIENTS = Color.BLUE.gradient(Color.RED, 30)
+GRADIENT_HEX = [color.hex() for color in GRADIENTS] + [Color.RED.hex()]
+
+view: Optional[Viewport] = None  # region of the board shown, set with the window
 
 
-def draw_board(board: list[str], block_size: int) -> None:
-    """Draw text-based board
+def draw_board(
+    board: list[str], block_size: int, radius: float = RRADIUS
+) -> list[int]:
+    """Draw the cells of a text-based board shown in the window
 
     Parameters
     ----------
@@ -32,22 +56,35 @@ def draw_board(board: list[str], block_size: int) -> None:
         board to draw. Contains list of strings that code the type of tiles
     block_size : int
         padding between each block
+    radius : float, optional
+        radius of the car in blocks, by default RRADIUS
+
+    Returns
+    -------
+    list[int]
+        list of tags used to draw the cells
     """
-    for y, line in enumerate(board):
-        for x, char in enumerate(line):
-            if char in COLORS:
-                color = COLORS[char]
-                fltk.cercle(
-                    x * block_size,
-                    y * block_size,
-                    block_size * RRADIUS,
-                    couleur=color,
-                    remplissage=color,
+    size = block_size * radius * view.zoom
+    first_x, first_y, last_x, last_y = view.cells(block_size, size)
+    tags = []
+    for y in range(max(0, first_y), min(len(board) - 1, last_y) + 1):
+        line = board[y]
+        for x in range(max(0, first_x), min(len(line) - 1, last_x) + 1):
+            if line[x] in COLORS:
+                color = COLORS[line[x]]
+                tags.append(
+                    fltk.cercle(
+                        *view.to_window(x * block_size, y * block_size),
+                        size,
+                        couleur=color,
+                        remplissage=color,
+                    )
                 )
+    return tags
 
 
-def draw_grid(width: int, height: int, spacing: int) -> None:
-    """Draw grid
+def draw_grid(width: int, height: int, spacing: int) -> list[int]:
+    """Draw the lines of the grid shown in the window
 
     Parameters
     ----------
@@ -57,17 +94,156 @@ def draw_grid(width: int, height: int, spacing: int) -> None:
         height of the map to draw the grid
     spacing : int
         padding between each dot
+
+    Returns
+    -------
+    list[int]
+        list of tags used to draw the lines
+    """
+    first_x, first_y, last_x, last_y = view.cells(spacing)
+    left, top = view.to_window(0, 0)
+    right, bottom = view.to_window(width * spacing, height * spacing)
+    left, top = max(0, left), max(0, top)
+    right, bottom = min(view.width, right), min(view.height, bottom)
+    tags = []
+    for y in range(max(0, first_y), min(height // spacing - 1, last_y) + 1):
+        window_y = view.to_window(0, y * spacing)[1]
+        tags.append(fltk.ligne(left, window_y, right, window_y))
+
+    for x in range(max(0, first_x), min(width // spacing - 1, last_x) + 1):
+        window_x = view.to_window(x * spacing, 0)[0]
+        tags.append(fltk.ligne(window_x, top, window_x, bottom))
+    return tags
+
+
+class Background:
+    """Static part of the window, drawn as the tiles of the board in the
+    window, or by a fallback drawing function if they can't be rendered
+
+    Attributes
+    ----------
+    tiles : Tiles
+        tiles of the board, None to always use `fallback`
+    fallback : Callable[[], list[int]]
+        draws the part of the board in the window and returns its tags
+    shown : dict[tuple[float, int, int], tuple[int, str]]
+        tag and path of each displayed tile, by zoom, column and row
+    tags : list[int]
+        tags drawn by `fallback`
+    """
+
+    def __init__(
+        self, tiles: Optional[Tiles], fallback: Callable[[], list[int]]
+    ) -> None:
+        """Constructor of the 'Background' object
+
+        Parameters
+        ----------
+        tiles : Tiles, optional
+            tiles of the board, None to always use `fallback`
+        fallback : Callable[[], list[int]]
+            draws the part of the board in the window and returns its tags
+        """
+        self.tiles = tiles
+        self.fallback = fallback
+        self.shown = {}
+        self.tags = []
+
+    def draw(self) -> None:
+        """Draw the part of the board in the window, replacing the previous
+        one. Images of tiles that left the window are released"""
+        shown, self.shown = self.shown, {}
+        erase_tags(self.tags)
+        self.tags = []
+        if self.tiles is not None:
+            self.draw_tiles()
+        for key, (tag, path) in shown.items():
+            fltk.efface(tag)
+            if key not in self.shown:
+                fltk.oublie_image(path)
+        if self.tiles is None:
+            self.tags = self.fallback()
+
+    def draw_tiles(self) -> None:
+        """Draw the tiles in the window, or none of them, and stop using tiles,
+        if one of them can't be rendered"""
+        columns = range(view.x // TILE_SIZE, (view.x + view.width - 1) // TILE_SIZE + 1)
+        rows = range(view.y // TILE_SIZE, (view.y + view.height - 1) // TILE_SIZE + 1)
+        for row in rows:
+            for column in columns:
+                key = (view.zoom, column, row)
+                box = self.tiles.box(*key)
+                if not box[2] or not box[3]:
+                    continue
+                path = self.tiles.tile(*key)
+                if path is None:  # the cache can't be written
+                    self.tiles = None
+                    for tag, path in self.shown.values():
+                        fltk.efface(tag)
+                        fltk.oublie_image(path)
+                    self.shown = {}
+                    return
+                tag = fltk.image(
+                    box[0] - view.x, box[1] - view.y, path, ancrage="nw"
+                )
+                self.shown[key] = (tag, path)
+
+
+def draw_board_background(
+    board: list[str], block_size: int, radius: float = RRADIUS
+) -> None:
+    """Draw text-based board and its grid as the images of the tiles in the
+    window, rasterized once then cached on disk. They are drawn by
+    `draw_board` and `draw_grid` if the images can't be cached
+
+    Parameters
+    ----------
+    board : list[str]
+        board to draw. Contains list of strings that code the type of tiles
+    block_size : int
+        padding between each block
+    radius : float, optional
+        radius of the car in blocks, by default RRADIUS
     """
-    for y in range(height // spacing):
-        fltk.ligne(0, y * spacing, width * spacing, y * spacing)
 
-    for x in range(width // spacing):
-        fltk.ligne(x * spacing, 0, x * spacing, height * spacing)
+    def fallback() -> list[int]:
+        return draw_board(board, block_size, radius) + draw_grid(
+            len(board[0]) * block_size, len(board) * block_size, block_size
+        )
+
+    background = Background(BoardTiles(board, block_size, radius), fallback)
+    view.watch(background.draw)
+    background.draw()
+
+
+def navigate(key: str) -> bool:
+    """Pan the viewport if `key` is an arrow, zoom it in or out if `key` is
+    plus or minus
+
+    Parameters
+    ----------
+    key : str
+        pressed key
+
+    Returns
+    -------
+    bool
+        True if `key` is one of the navigation keys, else False
+    """
+    if key in PAN_KEYS:
+        dx, dy = PAN_KEYS[key]
+        view.pan(dx * PAN_STEP * view.width, dy * PAN_STEP * view.height)
+        return True
+    if key in ZOOM_KEYS:
+        view.zoom_by(ZOOM_KEYS[key])
+        return True
+    return False
 
 
 def wait_event() -> str:
     """Wait until a fltk's event is triggered. If the evnet is a pressed key,
-    `wait_event` returns the pressed key
+    `wait_event` returns the pressed key. Navigation keys move the viewport
+    instead of being returned
 
     Returns
     -------
@@ -78,9 +254,11 @@ def wait_event() -> str:
     while True:
         ev = fltk.donne_ev()
         tev = fltk.type_ev(ev)
-        if tev is not None:
-            if tev == "Touche":
-                return fltk.touche(ev)
+        if tev == "Touche":
+            key = fltk.touche(ev)
+            if not navigate(key):
+                return key
+        elif tev is not None:
             return tev
         fltk.mise_a_jour()
 
@@ -91,9 +269,14 @@ def wait_exit() -> None:
         ...
 
 
+def position(board: Board, cell: Cell) -> tuple[float, float]:
+    """Window coordinates of `cell`"""
+    return view.to_window(cell.x * board.padding, cell.y * board.padding)
+
+
 def draw_points(points: set[Cell], board: Board) -> list[int]:
-    """Draw given points. Points will be multiplied by board.padding
-    to scale them at the correct proportions
+    """Draw given points shown in the window. Points will be multiplied by
+    board.padding to scale them at the correct proportions
 
     Parameters
     ----------
@@ -107,10 +290,9 @@ def draw_points(points: set[Cell], board: Board) -> list[int]:
         list of tags used to plot points
     """
     return [
-        fltk.cercle(
-            cell.x * board.padding, cell.y * board.padding, PRADIUS, remplissage="white"
-        )
+        fltk.cercle(*position(board, cell), PRADIUS, remplissage="white")
         for cell in points
+        if shown(board, cell, cell)
     ]
 
 
@@ -132,8 +314,7 @@ def get_cell_from_click(points: set[Cell], board: Board) -> Cell:
     cell = Cell(fltk.abscisse_souris(), fltk.ordonnee_souris())
 
     for point in points:
-        p = Cell(point.x * board.padding, point.y * board.padding)
-        if distance(p, cell) < PRADIUS:
+        if distance(Cell(*position(board, point)), cell) < PRADIUS:
             return point
     return None
 
@@ -172,8 +353,41 @@ def get_color(a: Cell, b: Cell) -> Color:
     return GRADIENTS[dist]
 
 
+def get_hex(a: Cell, b: Cell) -> str:
+    """Hexadecimal code of `get_color(a, b)`, computed once per color"""
+    return GRADIENT_HEX[min(int(distance(a, b)) * 10, len(GRADIENTS))]
+
+
+def shown(board: Board, a: Cell, b: Cell) -> bool:
+    """Check if the segment from `a` to `b` crosses the window"""
+    padding = board.padding
+    return view.visible(
+        a.x * padding, a.y * padding, b.x * padding, b.y * padding, PRADIUS
+    )
+
+
+def draw_point(board: Board, point: Cell) -> list[int]:
+    if not shown(board, point, point):
+        return []
+    x, y = position(board, point)
+    return [fltk.cercle(x, y, PRADIUS, remplissage="blue")]
+
+
+def draw_segment(board: Board, a: Cell, b: Cell) -> list[int]:
+    if not shown(board, a, b):
+        return []
+    color = get_hex(a, b)
+    ax, ay = position(board, a)
+    bx, by = position(board, b)
+    return [
+        fltk.cercle(ax, ay, PRADIUS, remplissage=color),
+        fltk.cercle(bx, by, PRADIUS, remplissage=color),
+        fltk.ligne(ax, ay, bx, by, epaisseur=2, couleur=color),
+    ]
+
+
 def draw_trajectory(board: Board) -> list[int]:
-    """Draw a representation of trajectory (a list of cells)
+    """Draw the segments of trajectory (a list of cells) shown in the window
 
     Parameters
     ----------
@@ -186,28 +400,197 @@ def draw_trajectory(board: Board) -> list[int]:
         list of tags needed to draw the trajectory
     """
     if len(board.trajectory) == 1:
-        point = board.trajectory[0]
-        return [
-            fltk.cercle(
-                point.x * board.padding,
-                point.y * board.padding,
-                PRADIUS,
-                remplissage="blue",
-            )
-        ]
+        return draw_point(board, board.trajectory[0])
 
-    points = zip(board.trajectory, board.trajectory[1:])
     tags = []
-    for a, b in points:
-        color = get_color(a, b).hex()
-        ax, ay = a.x * board.padding, a.y * board.padding
-        bx, by = b.x * board.padding, b.y * board.padding
-        tags.append(fltk.cercle(ax, ay, PRADIUS, remplissage=color))
-        tags.append(fltk.cercle(bx, by, PRADIUS, remplissage=color))
-        tags.append(fltk.ligne(ax, ay, bx, by, epaisseur=2, couleur=color))
+    for a, b in zip(board.trajectory, board.trajectory[1:]):
+        tags.extend(draw_segment(board, a, b))
     return tags
 
 
+class TrajectoryRenderer:
+    """Trajectory kept drawn on the window. Each new trajectory only redraws
+    the segments following the part it shares with the previous one, so
+    drawing a trajectory that grows or shrinks at its end costs the same
+    whatever its length. Segments outside the window have no tags, and the
+    whole trajectory is drawn again when the viewport moves
+
+    Attributes
+    ----------
+    board : Board
+        board the trajectory is drawn on
+    drawn : list[Cell]
+        trajectory currently drawn
+    segments : list[list[int]]
+        tags of each drawn segment, the segment `i` going from `drawn[i]` to
+        `drawn[i + 1]`, or tags of the only point of `drawn`
+    """
+
+    def __init__(self, board: Board) -> None:
+        """Constructor of the 'TrajectoryRenderer' object
+
+        Parameters
+        ----------
+        board : Board
+            board the trajectory is drawn on
+        """
+        self.board = board
+        self.drawn = []
+        self.segments = []
+        view.watch(self.redraw)
+
+    def draw(self, trajectory: list[Cell]) -> None:
+        """Replace the drawn trajectory by `trajectory`
+
+        Parameters
+        ----------
+        trajectory : list[Cell]
+            trajectory to draw
+        """
+        drawn = self.drawn
+        common = 0
+        for a, b in zip(drawn, trajectory):
+            if a != b:
+                break
+            common += 1
+        if common == len(drawn) == len(trajectory):
+            return
+
+        # a lone point is drawn differently than the start of a segment
+        kept = max(common - 1, 0) if len(drawn) > 1 and len(trajectory) > 1 else 0
+        for tags in self.segments[kept:]:
+            erase_tags(tags)
+        del self.segments[kept:]
+
+        if len(trajectory) == 1:
+            self.segments.append(draw_point(self.board, trajectory[0]))
+        for a, b in zip(trajectory[kept:], trajectory[kept + 1 :]):
+            self.segments.append(draw_segment(self.board, a, b))
+        self.drawn = list(trajectory)
+
+    def redraw(self) -> None:
+        """Draw the trajectory again, for the current viewport"""
+        drawn = self.drawn
+        self.clear()
+        self.draw(drawn)
+
+    def clear(self) -> None:
+        """Erase the drawn trajectory"""
+        self.draw([])
+
+
+def draw_solution(
+    board: Board, trajectory: list[Cell], bound: Optional[float]
+) -> list[int]:
+    """Draw the segments shown in the window of the best trajectory found so
+    far by an anytime search, with its length and the bound of its number of
+    moves over the optimal one
+
+    Parameters
+    ----------
+    board : Board
+        board
+    trajectory : list[Cell]
+        trajectory to draw
+    bound : float, optional
+        bound of the trajectory, None if unknown
+
+    Returns
+    -------
+    list[int]
+        list of tags needed to draw the trajectory
+    """
+    tags = []
+    for a, b in zip(trajectory, trajectory[1:]):
+        if shown(board, a, b):
+            ax, ay = position(board, a)
+            bx, by = position(board, b)
+            tags.append(fltk.ligne(ax, ay, bx, by, epaisseur=4, couleur="black"))
+    label = f"Best: {len(trajectory)} positions"
+    if bound is not None:
+        label += f", at most {bound:.2f} times optimal"
+    tags.append(fltk.texte(5, 5, label, taille=12))
+    return tags
+
+
+class HeatmapOverlay:
+    """Heatmap of the cells in the window displayed over the board as a single
+    image. The image is written to two files in turn, so the window loads the
+    new one while the previous one is still displayed. It is drawn again when
+    the viewport moves
+
+    Attributes
+    ----------
+    board : Board
+        board the heatmap is drawn on
+    heatmap : Heatmap
+        heatmap to draw
+    directory : TemporaryDirectory
+        directory holding the files of the image
+    tag : int
+        tag of the displayed image, None before the first drawing
+    drawings : int
+        number of times the heatmap was drawn
+    """
+
+    def __init__(self, board: Board, heatmap: Heatmap) -> None:
+        """Constructor of the 'HeatmapOverlay' object
+
+        Parameters
+        ----------
+        board : Board
+            board the heatmap is drawn on
+        heatmap : Heatmap
+            heatmap to draw
+        """
+        self.board = board
+        self.heatmap = heatmap
+        self.directory = TemporaryDirectory(prefix="racetrack-")
+        self.tag = None
+        self.drawings = 0
+        view.watch(self.draw)
+
+    def edges(self, first: int, last: int, axis: int) -> list[int]:
+        """Window coordinates, along `axis`, of the sides of the cells from
+        `first` to `last`, clipped to the window"""
+        size = view.width if axis == 0 else view.height
+        res = []
+        for index in range(first, last + 2):
+            point = [0, 0]
+            point[axis] = (index - 0.5) * self.board.padding
+            res.append(min(max(0, round(view.to_window(*point)[axis])), size))
+        return res
+
+    def draw(self) -> None:
+        """Replace the displayed image by the current state of the heatmap"""
+        heatmap = self.heatmap
+        first_x, first_y, last_x, last_y = view.cells(
+            self.board.padding, self.board.padding * view.zoom
+        )
+        first_x, first_y = max(first_x, heatmap.min_x), max(first_y, heatmap.min_y)
+        last_x = min(last_x, heatmap.min_x + heatmap.width - 1)
+        last_y = min(last_y, heatmap.min_y + heatmap.height - 1)
+        xs = self.edges(first_x, last_x, 0) if first_x <= last_x else [0]
+        ys = self.edges(first_y, last_y, 1) if first_y <= last_y else [0]
+        tag = None
+        if xs[0] < xs[-1] and ys[0] < ys[-1]:
+            path = os.path.join(self.directory.name, f"heatmap{self.drawings % 2}.png")
+            # the image loaded from this file two drawings ago is no longer shown
+            fltk.oublie_image(path)
+            heatmap.save(path, first_x, first_y, xs, ys)
+            tag = fltk.image(xs[0], ys[0], path, ancrage="nw")
+            self.drawings += 1
+        if self.tag is not None:
+            fltk.efface(self.tag)
+        self.tag = tag
+
+    def close(self) -> None:
+        """Stop following the viewport and remove the files of the image,
+        which stays displayed"""
+        view.unwatch(self.draw)
+        self.directory.cleanup()
+
+
 def create_window_board(board: list[str], block_size: int) -> None:
     """Initiate fltk's window in order to correctly display a text-based board
 
@@ -218,28 +601,63 @@ def create_window_board(board: list[str], block_size: int) -> None:
     block_size : int
         padding between each block
     """
-    width = len(board[0]) - 1
-    height = len(board) - 1
-    fltk.cree_fenetre(width * block_size, height * block_size)
+    global view
+    width = (len(board[0]) - 1) * block_size
+    height = (len(board) - 1) * block_size
+    window = min(width, WINDOW_SIZE[0]), min(height, WINDOW_SIZE[1])
+    fltk.cree_fenetre(*window)
+    view = Viewport(*window, width, height)
 
 
-def create_window_image(image_path: str) -> fltk.PhotoImage:
+def create_window_image(
+    image_path: str, spacing: Optional[int] = None
+) -> fltk.PhotoImage:
     """Initiate fltk's window in order to correctly display an image-based board
 
     Parameters
     ----------
     image_path : str
         path to the image
+    spacing : int, optional
+        space between each coordinates, the grid being drawn with the image in
+        tiles cached on disk if given, by default None
 
     Returns
     -------
     fltk.PhotoImage
         image object
     """
+    global view
     fltk.cree_fenetre(500, 500, redimension=True)
 
     image = fltk.PhotoImage(file=image_path)
-    fltk.redimensionne_fenetre(image.width(), image.height())
-
-    fltk.image(0, 0, image_path, ancrage="nw")
+    width, height = image.width(), image.height()
+    window = min(width, WINDOW_SIZE[0]), min(height, WINDOW_SIZE[1])
+    fltk.redimensionne_fenetre(*window)
+    view = Viewport(*window, width, height)
+
+    def fallback() -> list[int]:
+        # the whole image, scaled by Tk
+        tags = [
+            fltk.image(
+                *view.to_window(0, 0),
+                image_path,
+                largeur=round(width * view.zoom),
+                hauteur=round(height * view.zoom),
+                ancrage="nw",
+            )
+        ]
+        if spacing is not None:
+            tags.extend(draw_grid(width, height, spacing))
+        return tags
+
+    tiles = None
+    if spacing is not None:
+        try:
+            tiles = ImageTiles(image_path, spacing, width, height)
+        except OSError:
+            pass
+    background = Background(tiles, fallback)
+    view.watch(background.draw)
+    background.draw()
     return image
@@ -0,0 +1,109 @@
+"""Contains the heatmap of the positions expanded by a search
+
+Drawing one canvas item per expanded position would create tens of thousands
+of items on large searches. The expansions are instead counted in a flat
+array holding one entry per cell spanned by the legal cells, then converted
+to an image of the cells in the window, which the window displays as a single
+item.
+"""
+
+from math import log
+
+from src.board import Cell, Board
+from src.color import Color
+from src.png import write_png
+
+__all__ = ["Heatmap"]
+
+OPACITY = 160  # of the expanded cells, the other ones are transparent
+SHADES = [
+    bytes((*color.rgb(), OPACITY)) for color in Color.BLUE.gradient(Color.RED, 64)
+]
+
+
+class Heatmap:
+    """Number of times each position was expanded by a search
+
+    Attributes
+    ----------
+    min_x : int
+        lowest abscissa of the legal cells
+    min_y : int
+        lowest ordinate of the legal cells
+    width : int
+        number of columns spanned by the legal cells
+    height : int
+        number of rows spanned by the legal cells
+    counts : list[int]
+        expansions of each cell, row by row
+    peak : int
+        highest number of expansions of a cell
+    """
+
+    def __init__(self, board: Board) -> None:
+        """Constructor of the 'Heatmap' object
+
+        Parameters
+        ----------
+        board : Board
+            board the search runs on
+        """
+        xs = [cell.x for cell in board.legal] or [0]
+        ys = [cell.y for cell in board.legal] or [0]
+        self.min_x, self.min_y = min(xs), min(ys)
+        self.width = max(xs) - self.min_x + 1
+        self.height = max(ys) - self.min_y + 1
+        self.counts = [0] * (self.width * self.height)
+        self.peak = 0
+
+    def visit(self, position: Cell) -> None:
+        """Count one more expansion of `position`, which must be legal"""
+        index = (position.y - self.min_y) * self.width + position.x - self.min_x
+        count = self.counts[index] + 1
+        self.counts[index] = count
+        if count > self.peak:
+            self.peak = count
+
+    def rows(self, left: int, top: int, xs: list[int], ys: list[int]) -> list[bytes]:
+        """Pixels of the cells from column `left` and row `top`, as red, green,
+        blue and opacity components, row by row. Cells are shaded from blue to
+        red on a logarithmic scale of their expansions, cells never expanded
+        being transparent
+
+        Parameters
+        ----------
+        left : int
+            abscissa of the first cell drawn
+        top : int
+            ordinate of the first cell drawn
+        xs : list[int]
+            pixel abscissas of the sides of the columns drawn, in order
+        ys : list[int]
+            pixel ordinates of the sides of the rows drawn, in order
+
+        Returns
+        -------
+        list[bytes]
+            pixels of the image, row by row
+        """
+        scale = (len(SHADES) - 1) / log(self.peak) if self.peak > 1 else 0
+        shades = {0: bytes(4)}
+        widths = [b - a for a, b in zip(xs, xs[1:])]
+        rows = []
+        for y, height in enumerate(b - a for a, b in zip(ys, ys[1:])):
+            start = (top - self.min_y + y) * self.width + left - self.min_x
+            pixels = []
+            for count, width in zip(self.counts[start : start + len(widths)], widths):
+                shade = shades.get(count)
+                if shade is None:
+                    shade = shades[count] = SHADES[int(log(count) * scale)]
+                pixels.append(shade * width)
+            rows.extend([b"".join(pixels)] * height)
+        return rows
+
+    def save(
+        self, path: str, left: int, top: int, xs: list[int], ys: list[int]
+    ) -> None:
+        """Write the cells from column `left` and row `top` to the PNG file at
+        `path`, with the sides at the pixels `xs` and `ys` like `rows`"""
+        write_png(path, xs[-1] - xs[0], self.rows(left, top, xs, ys), alpha=True)
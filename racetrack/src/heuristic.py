@@ -0,0 +1,329 @@
+"""Contains the heuristics used by informed solvers
+
+A heuristic is built once per board and then called with the position and the
+speed of a search node. It returns an estimation of the number of moves still
+needed to reach the finish line under the rule applied to movements. Heuristics
+flagged as `admissible` never overestimate that number, which makes the
+solutions found by `astar` optimal.
+
+Heuristics are called for every node generated by a search, so whatever
+depends on the finish line is computed into tables when they are built, and
+calls only look values up.
+"""
+
+from math import inf, isqrt
+
+from src.board import EMPTY, Cell, Board, neighbourhoods
+from src.field import DistanceField
+from src.settings import LAX_RULE
+from src.state import StateSpace
+from src.tools import finish_distances
+
+__all__ = [
+    "Heuristic",
+    "NullHeuristic",
+    "TurnsHeuristic",
+    "FloodHeuristic",
+    "DistanceHeuristic",
+    "HEURISTICS",
+]
+
+
+class Heuristic:
+    """Base class of every heuristic. Subclasses must implement `__call__`
+
+    Attributes
+    ----------
+    board : Board
+        board the heuristic estimates distances on
+    rule : str
+        rule applied to movements
+    admissible : bool
+        True if the heuristic never overestimates the remaining number of
+        moves
+    """
+
+    admissible = False
+
+    def __init__(self, board: Board, rule: str = LAX_RULE) -> None:
+        """Constructor of the 'Heuristic' object
+
+        Parameters
+        ----------
+        board : Board
+            board the heuristic estimates distances on
+        rule : str, optional
+            rule applied to movements, by default `LAX_RULE` under which
+            walls can be jumped over
+        """
+        self.board = board
+        self.rule = rule
+
+    def __call__(self, position: Cell, speed: Cell) -> int:
+        """Estimate the number of moves needed to reach the finish line
+
+        Parameters
+        ----------
+        position : Cell
+            current position of the car
+        speed : Cell
+            current speed of the car
+
+        Returns
+        -------
+        int
+            estimated number of remaining moves
+        """
+        raise NotImplementedError
+
+
+class NullHeuristic(Heuristic):
+    """Always estimate 0 remaining moves, turning A* into a uniform cost
+    search"""
+
+    admissible = True
+
+    def __call__(self, position: Cell, speed: Cell) -> int:
+        return 0
+
+
+def path_turns(gap: int, speed: int) -> int:
+    """Compute the minimum number of moves needed to cover `gap` cells one
+    after the other, starting at `speed` cells per move. Each move covers at
+    most one cell more than the previous one, so `t` moves cover at most
+    `t * speed + t(t+1)/2` cells, and `t` is found from the root of that
+    bound
+
+    Parameters
+    ----------
+    gap : int
+        number of cells to cover
+    speed : int
+        current speed towards the cells to cover
+
+    Returns
+    -------
+    int
+        minimum number of moves
+    """
+    if gap <= 0:
+        return 0
+    b = 2 * speed + 1
+    turns = max(0, (isqrt(b * b + 8 * gap) - b) // 2)
+    while turns * (turns + b) < 2 * gap:
+        turns += 1
+    return turns
+
+
+def axis_turns(low: int, high: int, speed: int) -> int:
+    """Compute the minimum number of moves needed to end between `low` and
+    `high` cells away along one axis, starting at `speed`. After `t` moves
+    the car can be anywhere between `t * speed - t(t+1)/2` and
+    `t * speed + t(t+1)/2`, so `t` is found from the roots of both bounds
+    instead of trying every number of moves
+
+    Parameters
+    ----------
+    low : int
+        signed distance to the nearest cell to reach
+    high : int
+        signed distance to the farthest cell to reach, at least `low`
+    speed : int
+        signed speed along the same axis
+
+    Returns
+    -------
+    int
+        minimum number of moves
+    """
+    if high < 0:  # mirrored, so the cells to reach are ahead
+        low, high, speed = -high, -low, -speed
+    if low <= 0:
+        return 0
+    # the farthest position, t * speed + t(t+1)/2, must reach `low`
+    turns = path_turns(low, speed)
+    # and the nearest one, t * speed - t(t+1)/2, must not overshoot `high`:
+    # when it does, wait for the larger root of that bound
+    c = 1 - 2 * speed
+    if turns * (turns + c) + 2 * high < 0:
+        turns = max(turns, (isqrt(c * c - 8 * high) - c) // 2)
+        while turns * (turns + c) + 2 * high < 0:
+            turns += 1
+    return turns
+
+
+def axis_table(ends: set[int], size: int, max_speed: int) -> list[list[int]]:
+    """Compute the minimum number of moves needed to reach one of the
+    coordinates `ends` along one axis, for every speed then every coordinate
+
+    Parameters
+    ----------
+    ends : set[int]
+        coordinates to reach
+    size : int
+        number of coordinates, from 0
+    max_speed : int
+        highest absolute speed
+
+    Returns
+    -------
+    list[list[int]]
+        minimum number of moves, indexed by `speed + max_speed` then
+        coordinate. Infinite if there is no coordinate to reach
+    """
+    runs = []  # first and last coordinates of consecutive ends
+    for end in sorted(ends):
+        if runs and runs[-1][1] == end - 1:
+            runs[-1][1] = end
+        else:
+            runs.append([end, end])
+    return [
+        [
+            min(
+                (axis_turns(first - x, last - x, speed) for first, last in runs),
+                default=inf,
+            )
+            for x in range(size)
+        ]
+        for speed in range(-max_speed, max_speed + 1)
+    ]
+
+
+class TurnsHeuristic(Heuristic):
+    """Minimum number of moves needed to reach the finish line when walls are
+    ignored, given the current speed of the car. Both axes are tabled when
+    the heuristic is built, so a call is two lookups. The estimation is the
+    largest of the numbers of moves needed along each axis, which is exact
+    when the finish cells form a rectangle, as on every shipped map, and a
+    lower bound otherwise
+
+    Attributes
+    ----------
+    max_vx : int
+        highest absolute horizontal speed tabled, one more than reachable on
+        the board so that the speed after any move is tabled
+    max_vy : int
+        highest absolute vertical speed tabled, one more than reachable on
+        the board
+    columns : list[list[int]]
+        moves needed along the horizontal axis, by `speed.x + max_vx` then
+        abscissa
+    rows : list[list[int]]
+        moves needed along the vertical axis, by `speed.y + max_vy` then
+        ordinate
+    """
+
+    admissible = True
+
+    def __init__(self, board: Board, rule: str = LAX_RULE) -> None:
+        super().__init__(board, rule)
+        space = StateSpace(board)  # bounds positions and speeds alike
+        self.max_vx, self.max_vy = space.max_vx + 1, space.max_vy + 1
+        self.columns = axis_table(
+            {end.x for end in board.end}, space.min_x + space.width, self.max_vx
+        )
+        self.rows = axis_table(
+            {end.y for end in board.end}, space.min_y + space.height, self.max_vy
+        )
+
+    def __call__(self, position: Cell, speed: Cell) -> int:
+        return max(
+            self.columns[speed.x + self.max_vx][position.x],
+            self.rows[speed.y + self.max_vy][position.y],
+        )
+
+
+class FloodHeuristic(TurnsHeuristic):
+    """`TurnsHeuristic`, raised by two bounds that depend on the walls.
+
+    Under the strict rule, every move follows crossable cells one at a time,
+    so covering the shortest path to the finish line around the walls, one
+    cell more per move at best, takes a minimum number of moves. Cells cut
+    off from the finish line are infinitely far from it.
+
+    Under both rules, the next position of the car is one of the nine cells
+    around `position + speed`, and it must be a legal cell from which the
+    finish line can still be reached. The estimation is raised to one move
+    plus the lowest of the bounds above among those cells, so a car heading
+    into a wall or away from the finish line is estimated further. Walls
+    are only taken into account at the cells the car lands on, segments
+    being left to the search
+
+    Attributes
+    ----------
+    flood : dict[Cell, tuple[int, ...]]
+        minimum number of moves to follow the shortest path from every legal
+        cell to the finish line, by absolute speed on the fastest axis, None
+        under the lax rule
+    landing : dict[Cell, frozenset[Cell]]
+        legal cells from which the finish line can be reached, around every
+        cell next to one of them
+    """
+
+    admissible = True
+
+    def __init__(self, board: Board, rule: str = LAX_RULE) -> None:
+        super().__init__(board, rule)
+        finish = None if rule == LAX_RULE else finish_distances(board)
+        if finish is None:
+            self.flood = None
+            self.landing = neighbourhoods(board.legal)
+            return
+        speeds = range(max(self.max_vx, self.max_vy) + 1)
+        self.flood = {
+            cell: tuple(path_turns(finish[cell], speed) for speed in speeds)
+            for cell in board.legal
+            if cell in finish
+        }
+        self.landing = neighbourhoods(set(self.flood))
+
+    def bound(self, x: int, y: int, vx: int, vy: int) -> int:
+        """Estimation at (x, y) moving at (vx, vy), without looking at the
+        next move"""
+        turns = max(self.columns[vx + self.max_vx][x], self.rows[vy + self.max_vy][y])
+        if self.flood is None:
+            return turns
+        flood = self.flood.get((x, y))
+        if flood is None:
+            return inf
+        return max(turns, flood[max(abs(vx), abs(vy))])
+
+    def __call__(self, position: Cell, speed: Cell) -> int:
+        x, y = position
+        vx, vy = speed
+        estimate = self.bound(x, y, vx, vy)
+        if not estimate or estimate == inf:
+            return estimate
+        bound = self.bound
+        ahead = inf
+        for nx, ny in self.landing.get((x + vx, y + vy), EMPTY):
+            if nx != x or ny != y:  # a null speed stays on a visited cell
+                value = bound(nx, ny, nx - x, ny - y)
+                if value < ahead:
+                    ahead = value
+        return max(estimate, ahead + 1)
+
+
+class DistanceHeuristic(Heuristic):
+    """Straight-line distance to the nearest finish cell, read from a distance
+    field of the finish line. Greedy, as one move can cover several cells"""
+
+    def __init__(self, board: Board, rule: str = LAX_RULE) -> None:
+        super().__init__(board, rule)
+        space = StateSpace(board)
+        width, height = space.min_x + space.width, space.min_y + space.height
+        grid = [bytearray(width) for _ in range(height)]
+        for end in board.end:
+            grid[end.y][end.x] = 1
+        self.field = DistanceField(grid)
+
+    def __call__(self, position: Cell, speed: Cell) -> float:
+        return self.field.distances[position.y][position.x]
+
+
+HEURISTICS = {
+    "turns": TurnsHeuristic,
+    "flood": FloodHeuristic,
+    "distance": DistanceHeuristic,
+    "null": NullHeuristic,
+}
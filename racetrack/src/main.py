@@ -22,7 +22,15 @@ def play(board: Board, rule: str) -> None:
     waiting = False
     tags = []
     coords = None
+    renderer = graphic.TrajectoryRenderer(board)
 
+    def redraw_points() -> None:
+        nonlocal tags
+        if waiting:
+            graphic.erase_tags(tags)
+            tags = graphic.draw_points(coords, board)
+
+    graphic.view.watch(redraw_points)
     while event != "Quitte" and not board.win():
         if not waiting:
             if rule == STRICT_RULE:
@@ -39,14 +47,17 @@ def play(board: Board, rule: str) -> None:
             if cell in coords:
                 waiting = False
                 graphic.erase_tags(tags)
+                tags = []
                 board.append(cell)
-                tags.extend(graphic.draw_trajectory(board))
+                renderer.draw(board.trajectory)
         elif event == "BackSpace":
             if board.pop():
                 graphic.erase_tags(tags)
-                tags = graphic.draw_trajectory(board)
+                tags = []
+                renderer.draw(board.trajectory)
                 waiting = False
 
+    graphic.view.unwatch(redraw_points)
     if event == "Quitte":
         return
     graphic.wait_exit()
@@ -0,0 +1,130 @@
+"""Contains the compact representation of search states used by solvers
+
+A search node only stores its position, its speed and a reference to the node
+it comes from. The full trajectory is rebuilt on demand by following the
+parents, which keeps the memory needed by each node independent of the length
+of the path that leads to it.
+
+The footprint is a bloom filter of a fixed `FOOTPRINT_BITS` bits, one hashed
+bit per visited cell, checked before walking the parents. A cell whose bit is
+clear was never visited; a set bit is confirmed by walking the parents, so
+the answer is always exact and the size of a node does not depend on the
+length of its path. Past about a hundred cells most bits are set, and most
+queries walk the path.
+"""
+
+from typing import Optional
+
+from src.board import Cell
+
+__all__ = ["Node"]
+
+FOOTPRINT_BITS = 64  # number of bits of the visited-cells footprint
+
+
+class Node:
+    """Represent a state reached during a search
+
+    Attributes
+    ----------
+    parent : Node
+        node this one was expanded from, None for starting nodes
+    position : Cell
+        position of the car
+    speed : Cell
+        speed of the car when it reached `position`
+    depth : int
+        number of moves since the starting node
+    footprint : int
+        bloom filter of every position of the trajectory, used to quickly
+        reject cells that were never visited, `FOOTPRINT_BITS` bits wide
+    index : int
+        index of the state in the compiled graph of the board, None until the
+        node is expanded on a graph
+    """
+
+    __slots__ = ("parent", "position", "speed", "depth", "footprint", "index")
+
+    def __init__(
+        self, position: Cell, speed: Cell = None, parent: Optional["Node"] = None
+    ) -> None:
+        """Constructor of the 'Node' object
+
+        Parameters
+        ----------
+        position : Cell
+            position of the car
+        speed : Cell, optional
+            speed of the car, by default a null speed
+        parent : Node, optional
+            node this one was expanded from, by default None
+        """
+        self.parent = parent
+        self.position = position
+        self.speed = Cell(0, 0) if speed is None else speed
+        self.index = None
+        bit = 1 << (hash(position) % FOOTPRINT_BITS)
+        if parent is None:
+            self.depth = 0
+            self.footprint = bit
+        else:
+            self.depth = parent.depth + 1
+            self.footprint = parent.footprint | bit
+
+    def child(self, position: Cell) -> "Node":
+        """Create the node reached by moving to `position`
+
+        Parameters
+        ----------
+        position : Cell
+            next position of the car
+
+        Returns
+        -------
+        Node
+            created node
+        """
+        speed = Cell(position.x - self.position.x, position.y - self.position.y)
+        return Node(position, speed, self)
+
+    def visited(self, cell: Cell) -> bool:
+        """Check if the trajectory leading to this node goes through `cell`.
+        The footprint answers most negative queries without walking the
+        parents
+
+        Parameters
+        ----------
+        cell : Cell
+            cell to look for
+
+        Returns
+        -------
+        bool
+            True if `cell` is part of the trajectory, else False
+        """
+        if not self.footprint >> (hash(cell) % FOOTPRINT_BITS) & 1:
+            return False
+        node = self
+        while node is not None:
+            if node.position == cell:
+                return True
+            node = node.parent
+        return False
+
+    def trajectory(self) -> list[Cell]:
+        """Rebuild the trajectory leading to this node
+
+        Returns
+        -------
+        list[Cell]
+            list of positions from the starting node to this one
+        """
+        res = [None] * (self.depth + 1)
+        node = self
+        while node is not None:
+            res[node.depth] = node.position
+            node = node.parent
+        return res
+
+    def __repr__(self) -> str:
+        return f"Node(position: {self.position}, speed: {self.speed})"
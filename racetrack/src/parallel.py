@@ -0,0 +1,285 @@
+"""Contains a search distributed over several processes
+
+Every (position, speed) state, numbered by `StateSpace`, is owned by the
+worker selected by a multiplicative hash of its key. Keys of neighbouring
+states follow each other, so the key is mixed before picking the worker to
+spread every region of the board over all of them.
+Workers expand the states they own and send the successors to their owners
+in batches. The search proceeds by rounds: during a round every worker expands
+its states whose cost does not exceed a bound shared by all workers, then
+receives the successors sent by the others. A coordinator gathers the result
+of each round to pick the next bound and to decide when the best trajectory
+found is optimal.
+"""
+
+from math import inf
+from multiprocessing import Process, Queue
+from os import cpu_count
+from typing import Generator, Optional
+from warnings import warn
+
+from src.board import Cell, Board
+from src.buckets import BucketQueue
+from src.heuristic import FloodHeuristic, Heuristic
+from src.node import Node
+from src.settings import LAX_RULE
+from src.state import StateSpace
+from src.stats import SearchStats
+from src.tools import filter_positions
+
+__all__ = ["parallel_search"]
+
+BATCH_SIZE = 512  # number of states sent at once to another worker
+
+State = int  # key of a (position, speed) state in the `StateSpace` of the board
+MIX = 0x9E3779B97F4A7C15  # large odd constant, 2**64 divided by the golden ratio
+MASK = (1 << 64) - 1
+
+
+def owner(state: State, workers: int) -> int:
+    """Worker owning `state`: the key is multiplied by `MIX` modulo 2**64 and
+    the high bits of the product select the worker, so that consecutive keys
+    are spread evenly instead of cycling through the workers"""
+    return ((state * MIX) & MASK) * workers >> 64
+
+
+class Worker:
+    """Search data owned by one process
+
+    Attributes
+    ----------
+    index : int
+        index of the worker
+    space : StateSpace
+        numbering of the states of the board
+    inboxes : list[Queue]
+        queues receiving the successors sent to each worker
+    parents : dict[State, State]
+        best known predecessor of each owned state, None for starting states
+    depths : dict[State, int]
+        best known depth of each owned state
+    queue : BucketQueue
+        owned states waiting to be expanded with their depth, by cost
+    goal : tuple[int, State]
+        depth and state of the best finish state received, None if none yet
+    """
+
+    def __init__(
+        self,
+        index: int,
+        board: Board,
+        rule: str,
+        heuristic: type[Heuristic],
+        inboxes: list[Queue],
+    ) -> None:
+        self.index = index
+        self.space = StateSpace(board)
+        self.board = board
+        self.rule = rule
+        self.estimate = heuristic(board, rule)
+        self.inboxes = inboxes
+        self.parents = {}
+        self.depths = {}
+        self.queue = BucketQueue()
+        self.goal = None
+        self.skip = 0
+        self.expanded = 0
+
+    def receive(self, state: State, depth: int, parent: Optional[State]) -> None:
+        if depth >= self.depths.get(state, depth + 1):
+            self.skip += 1
+            return
+        self.depths[state] = depth
+        self.parents[state] = parent
+        position, speed = self.space.decode(state)
+        if position in self.board.end:
+            if self.goal is None or depth < self.goal[0]:
+                self.goal = (depth, state)
+            return
+        cost = self.estimate(position, speed)
+        if cost != inf:
+            self.queue.push(depth + cost, (depth, state))
+
+    def successors(self, state: State) -> set[Cell]:
+        """Next positions from `state`. Only the cells of the state and of its
+        parent are known to be part of the trajectory"""
+        position, speed = self.space.decode(state)
+        graph = self.board.graph
+        compiled = graph is not None and graph.rule == self.rule
+        if compiled:
+            coords = graph.successors(position, speed)
+        else:
+            coords = self.board.successors(position, speed)
+        excluded = {position}
+        if self.parents[state] is not None:
+            excluded.add(self.space.decode(self.parents[state])[0])
+        coords = {coord for coord in coords if coord not in excluded}
+        if self.rule == LAX_RULE or compiled:
+            return coords
+        return filter_positions(self.board, coords, position)
+
+    def expand(self, bound: int) -> None:
+        """Expand every owned state whose cost is lower or equal to `bound`,
+        then receive the states sent by the other workers"""
+        workers = len(self.inboxes)
+        batches = [[] for _ in range(workers)]
+        key = self.space.encode
+        while self.queue and self.queue.peek()[0] <= bound:
+            depth, state = self.queue.pop()
+            if depth > self.depths[state]:
+                continue
+            self.expanded += 1
+            position = self.space.decode(state)[0]
+            for coord in self.successors(state):
+                child = key(coord, Cell(coord.x - position.x, coord.y - position.y))
+                target = owner(child, workers)
+                batches[target].append((child, depth + 1, state))
+                if len(batches[target]) >= BATCH_SIZE and target != self.index:
+                    self.inboxes[target].put(batches[target])
+                    batches[target] = []
+
+        for target, batch in enumerate(batches):
+            if target != self.index:
+                self.inboxes[target].put(batch)
+                self.inboxes[target].put(None)
+        for child in batches[self.index]:
+            self.receive(*child)
+
+        remaining = workers - 1
+        while remaining:
+            batch = self.inboxes[self.index].get()
+            if batch is None:
+                remaining -= 1
+                continue
+            for child in batch:
+                self.receive(*child)
+
+    def report(self) -> tuple:
+        """Summary of the worker's state sent to the coordinator: lowest
+        cost of the owned states to expand with the matching state, best
+        finish state received and counters"""
+        counters = (self.expanded, self.skip, len(self.queue))
+        if not self.queue:
+            return (self.index, None, self.goal, *counters, None)
+        lowest, (_, state) = self.queue.peek()
+        return (self.index, lowest, self.goal, *counters, state)
+
+
+def work(
+    index: int,
+    board: Board,
+    rule: str,
+    heuristic: type[Heuristic],
+    inboxes: list[Queue],
+    commands: Queue,
+    results: Queue,
+) -> None:
+    worker = Worker(index, board, rule, heuristic, inboxes)
+    for start in board.start:
+        state = worker.space.encode(start, Cell(0, 0))
+        if owner(state, len(inboxes)) == index:
+            worker.receive(state, 0, None)
+    results.put(worker.report())
+
+    while True:
+        command, argument = commands.get()
+        if command == "expand":
+            worker.expand(argument)
+            results.put(worker.report())
+        elif command == "parent":
+            results.put(worker.parents[argument])
+        else:
+            return
+
+
+def parallel_search(
+    board: Board,
+    rule: str,
+    workers: int = None,
+    heuristic: type[Heuristic] = FloodHeuristic,
+    stats: SearchStats = None,
+) -> Generator[Node, None, list[Cell]]:
+    """A* distributed over `workers` processes, breadth first search when
+    used with `NullHeuristic`. The heuristic must be consistent for the
+    solution to be optimal. Workers only know the parent of each state, not
+    the trajectory leading to it, so they cannot reject a trajectory going
+    twice through the same cell: in the rare case where the best one does,
+    a `RuntimeWarning` is issued and the search is restarted with `astar`
+    on one process. Workers run in other processes, so only their counters
+    are gathered when profiling.
+
+    Workers only pay off with as many free cores: rounds are synchronized
+    and every successor owned by another worker goes through a queue, so
+    more workers than cores only add overhead. The benchmark runner measures
+    the speedup against the number of workers with `--workers`"""
+    stats = SearchStats() if stats is None else stats
+    space = StateSpace(board)
+    if workers is None:
+        workers = cpu_count()
+    inboxes = [Queue() for _ in range(workers)]
+    commands = [Queue() for _ in range(workers)]
+    results = Queue()
+    processes = [
+        Process(
+            target=work,
+            args=(index, board, rule, heuristic, inboxes, commands[index], results),
+            daemon=True,
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    stats.expanded = 0
+    stats.optimal = heuristic.admissible
+
+    try:
+        goal = None
+        while True:
+            reports = [results.get() for _ in range(workers)]
+            stats.expanded = sum(report[3] for report in reports)
+            stats.skip = sum(report[4] for report in reports)
+            stats.frontier = max(stats.frontier, sum(report[5] for report in reports))
+            for report in reports:
+                if report[2] is not None and (goal is None or report[2] < goal):
+                    goal = report[2]
+
+            bounds = [report[1] for report in reports if report[1] is not None]
+            bound = min(bounds) if bounds else None
+            if bound is None or (goal is not None and goal[0] <= bound):
+                break
+
+            best = min(
+                (report for report in reports if report[1] is not None),
+                key=lambda report: report[1],
+            )
+            yield Node(*space.decode(best[6]))
+            for queue in commands:
+                queue.put(("expand", bound))
+
+        if goal is None:
+            return None
+        trajectory = []
+        state = goal[1]
+        while state is not None:
+            trajectory.append(space.decode(state)[0])
+            commands[owner(state, workers)].put(("parent", state))
+            state = results.get()
+        trajectory.reverse()
+    finally:
+        for queue in commands:
+            queue.put(("stop", None))
+        for process in processes:
+            process.join()
+
+    if len(set(trajectory)) != len(trajectory):
+        from src.solve import astar
+
+        warn(
+            "the best trajectory found by the workers goes twice through the "
+            "same cell, searching again with astar on one process",
+            RuntimeWarning,
+        )
+        stats.expanded = None  # the nodes expanded are the ones yielded by A*
+        return (yield from astar(board, rule, heuristic, stats))
+    board.trajectory = trajectory
+    return trajectory
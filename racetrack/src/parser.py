@@ -3,12 +3,23 @@ and text-based maps
 """
 
 import argparse
+from inspect import signature
 from typing import Any
 
 from src import settings
+from src.heuristic import HEURISTICS
 from src.solve import SOLVERS
 
-__all__ = ["parse_args", "parse_map"]
+__all__ = [
+    "parse_args",
+    "parse_benchmark_args",
+    "parse_cache_args",
+    "parse_map",
+    "SOLVER_OPTIONS",
+]
+
+# arguments forwarded to the solvers that accept them
+SOLVER_OPTIONS = ("heuristic", "table_size", "workers", "beam_width")
 
 
 def parse_args() -> dict[str, Any]:
@@ -32,6 +43,29 @@ def parse_args() -> dict[str, Any]:
     parser.add_argument(
         "--time", "-t", default=False, action="store_true", required=False
     )
+    parser.add_argument(
+        "--graph", "-g", default=False, action="store_true", required=False
+    )
+    parser.add_argument(
+        "--headless", default=False, action="store_true", required=False
+    )
+    parser.add_argument(
+        "--profile", "-p", default=False, action="store_true", required=False
+    )
+    parser.add_argument(
+        "--heatmap", default=False, action="store_true", required=False
+    )
+    parser.add_argument("--output", "-O", type=str, default=None, required=False)
+    parser.add_argument(
+        "--cache",
+        "-c",
+        type=str,
+        nargs="?",
+        default=None,
+        const=settings.SOLUTION_CACHE_DIRECTORY,
+        required=False,
+        metavar="DIRECTORY",
+    )
     parser.add_argument(
         "--mode",
         "-m",
@@ -51,8 +85,108 @@ def parse_args() -> dict[str, Any]:
     parser.add_argument(
         "--solve", "-S", type=str, default=None, required=False, choices=SOLVERS.keys()
     )
+    parser.add_argument(
+        "--heuristic",
+        "-H",
+        type=str,
+        default=None,
+        required=False,
+        choices=HEURISTICS.keys(),
+    )
+    parser.add_argument("--table-size", type=int, default=None, required=False)
+    parser.add_argument("--workers", "-w", type=int, default=None, required=False)
+    parser.add_argument("--beam-width", "-b", type=int, default=None, required=False)
+    parser.add_argument("--radius", type=float, default=None, required=False)
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        required=False,
+        metavar="SECONDS",
+    )
     parser.add_argument("map", type=str)
 
+    args = parser.parse_args()
+    if args.headless and args.solve is None:
+        parser.error("--headless requires a solver (--solve)")
+    if args.output is not None and not args.headless:
+        parser.error("--output is only supported in --headless mode")
+    if args.profile and args.solve is None:
+        parser.error("--profile requires a solver (--solve)")
+    if args.cache is not None and args.solve is None:
+        parser.error("--cache requires a solver (--solve)")
+    if args.deadline is not None and args.solve is None:
+        parser.error("--deadline requires a solver (--solve)")
+    if args.deadline is not None and args.deadline <= 0:
+        parser.error("--deadline must be positive")
+    if args.beam_width is not None and args.beam_width < 1:
+        parser.error("--beam-width must be positive")
+    if args.heatmap and (args.solve is None or args.opti or args.headless):
+        parser.error("--heatmap requires a displayed search (--solve without --opti)")
+    if args.cache is not None and args.profile:
+        parser.error("--profile cannot be used with --cache")
+    if args.solve is not None and args.rule not in getattr(
+        SOLVERS[args.solve], "rules", {settings.STRICT_RULE, settings.LAX_RULE}
+    ):
+        parser.error(f"the {args.solve} solver does not support the {args.rule} rule")
+    for option in SOLVER_OPTIONS:
+        if getattr(args, option) is not None and (
+            args.solve is None
+            or option not in signature(SOLVERS[args.solve]).parameters
+        ):
+            parser.error(
+                f"--{option.replace('_', '-')} is not supported by the chosen solver"
+            )
+    return vars(args)
+
+
+def parse_benchmark_args() -> dict[str, Any]:
+    """Parse command line arguments of the benchmark runner
+
+    Returns
+    -------
+    dict[str, Any]
+        dictionnary of parameters that associate their value
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--solvers", nargs="+", default=list(SOLVERS), choices=SOLVERS.keys()
+    )
+    parser.add_argument(
+        "--rules",
+        nargs="+",
+        default=[settings.LAX_RULE, settings.STRICT_RULE],
+        choices={settings.STRICT_RULE, settings.LAX_RULE},
+    )
+    parser.add_argument("--maps", nargs="+", default=None, required=False)
+    parser.add_argument("--repeat", "-n", type=int, default=3, required=False)
+    parser.add_argument("--timeout", type=float, default=60, required=False)
+    parser.add_argument("--workers", nargs="+", type=int, default=None, required=False)
+    parser.add_argument(
+        "--tracemalloc", default=False, action="store_true", required=False
+    )
+    parser.add_argument("--json", type=str, default=None, required=False)
+    parser.add_argument("--csv", type=str, default=None, required=False)
+    return vars(parser.parse_args())
+
+
+def parse_cache_args() -> dict[str, Any]:
+    """Parse command line arguments of the solution cache manager
+
+    Returns
+    -------
+    dict[str, Any]
+        dictionnary of parameters that associate their value
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", type=str, choices={"list", "clear"})
+    parser.add_argument(
+        "--directory",
+        "-d",
+        type=str,
+        default=settings.SOLUTION_CACHE_DIRECTORY,
+        required=False,
+    )
     return vars(parser.parse_args())
 
 
@@ -0,0 +1,173 @@
+"""Contains a PNG decoder and encoder that don't depend on Tk
+
+Image-based boards are usually loaded from a Tk `PhotoImage`, which needs a
+display. Headless runs decode the map with `PNGImage` instead, which offers
+the methods of `PhotoImage` used by `Board.load_image`. Only non-interlaced
+images with 8 bits per channel are supported. Images built in memory, such as
+overlays, are written with `write_png` to be displayed by Tk.
+"""
+
+import struct
+import zlib
+from itertools import accumulate
+
+__all__ = ["PNGImage", "write_png"]
+
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}  # channels of each color type
+
+
+def chunk(kind: bytes, body: bytes) -> bytes:
+    crc = zlib.crc32(body, zlib.crc32(kind))
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", crc)
+
+
+def write_png(path: str, width: int, rows: list[bytes], alpha: bool = False) -> None:
+    """Write an image to the PNG file at `path`
+
+    Parameters
+    ----------
+    path : str
+        file to write
+    width : int
+        number of pixels of each row
+    rows : list[bytes]
+        red, green, blue and, with `alpha`, opacity components of every
+        pixel, row by row
+    alpha : bool, optional
+        the pixels have an opacity component, by default False
+    """
+    header = struct.pack(">IIBBBBB", width, len(rows), 8, 6 if alpha else 2, 0, 0, 0)
+    raw = b"".join(b"\x00" + row for row in rows)  # no filter
+    with open(path, "wb") as file:
+        file.write(SIGNATURE)
+        file.write(chunk(b"IHDR", header))
+        file.write(chunk(b"IDAT", zlib.compress(raw, 1)))
+        file.write(chunk(b"IEND", b""))
+
+
+def paeth(line: bytearray, previous: bytes, bpp: int) -> None:
+    for x in range(bpp):
+        line[x] = (line[x] + previous[x]) & 0xFF
+    for x in range(bpp, len(line)):
+        a, b, c = line[x - bpp], previous[x], previous[x - bpp]
+        pa, pb = abs(b - c), abs(a - c)
+        pc = abs(a + b - c - c)
+        if pa <= pb and pa <= pc:
+            line[x] = (line[x] + a) & 0xFF
+        elif pb <= pc:
+            line[x] = (line[x] + b) & 0xFF
+        else:
+            line[x] = (line[x] + c) & 0xFF
+
+
+def unfilter(kind: int, line: bytearray, previous: bytes, bpp: int) -> None:
+    """Reverse the filter `kind` applied to `line`, in place"""
+    if kind == 1:
+        for channel in range(bpp):
+            line[channel::bpp] = bytes(
+                accumulate(line[channel::bpp], lambda a, b: (a + b) & 0xFF)
+            )
+    elif kind == 2:
+        line[:] = bytes((a + b) & 0xFF for a, b in zip(line, previous))
+    elif kind == 3:
+        for x in range(len(line)):
+            left = line[x - bpp] if x >= bpp else 0
+            line[x] = (line[x] + (left + previous[x]) // 2) & 0xFF
+    elif kind == 4:
+        paeth(line, previous, bpp)
+    elif kind:
+        raise ValueError(f"unknown PNG filter {kind}")
+
+
+class PNGImage:
+    """Decoded PNG image, stored as rows of RGB bytes
+
+    Attributes
+    ----------
+    rows : list[bytes]
+        red, green and blue components of every pixel, row by row
+    """
+
+    def __init__(self, width: int, height: int, rows: list[bytes]) -> None:
+        self._width = width
+        self._height = height
+        self.rows = rows
+
+    @staticmethod
+    def open(path: str) -> "PNGImage":
+        """Decode the PNG file at `path`
+
+        Parameters
+        ----------
+        path : str
+            file to decode
+
+        Returns
+        -------
+        PNGImage
+            decoded image
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+        if not data.startswith(SIGNATURE):
+            raise ValueError(f"{path} is not a PNG file")
+
+        header, palette, compressed = None, None, []
+        position = len(SIGNATURE)
+        while position < len(data):
+            length, kind = struct.unpack_from(">I4s", data, position)
+            body = data[position + 8 : position + 8 + length]
+            position += length + 12
+            if kind == b"IHDR":
+                header = struct.unpack(">IIBBBBB", body)
+            elif kind == b"PLTE":
+                palette = body
+            elif kind == b"IDAT":
+                compressed.append(body)
+            elif kind == b"IEND":
+                break
+
+        width, height, depth, color, _, _, interlace = header
+        if depth != 8 or interlace or color not in CHANNELS:
+            raise ValueError(f"{path}: unsupported PNG format")
+        bpp = CHANNELS[color]
+        stride = width * bpp
+        raw = zlib.decompress(b"".join(compressed))
+
+        rows, previous = [], bytes(stride)
+        for y in range(height):
+            start = y * (stride + 1)
+            line = bytearray(raw[start + 1 : start + 1 + stride])
+            unfilter(raw[start], line, previous, bpp)
+            previous = line
+
+            if color in (2, 6):
+                rgb = bytearray(width * 3)
+                for channel in range(3):
+                    rgb[channel::3] = line[channel::bpp]
+            elif color == 3:
+                rgb = b"".join(palette[3 * index : 3 * index + 3] for index in line)
+            else:
+                rgb = bytes(value for value in line[::bpp] for _ in range(3))
+            rows.append(bytes(rgb))
+        return PNGImage(width, height, rows)
+
+    def width(self) -> int:
+        return self._width
+
+    def height(self) -> int:
+        return self._height
+
+    def get(self, x: int, y: int) -> tuple[int, int, int]:
+        """Color of the pixel at (x, y), as red, green and blue components"""
+        return tuple(self.rows[y][3 * x : 3 * x + 3])
+
+    def colors(self) -> list[list[str]]:
+        """Color of every pixel as '#rrggbb' strings, indexed by row then
+        column, like the data of a Tk `PhotoImage`"""
+        res = []
+        for row in self.rows:
+            digits = row.hex()
+            res.append(["#" + digits[x : x + 6] for x in range(0, len(digits), 6)])
+        return res
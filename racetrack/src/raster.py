@@ -0,0 +1,332 @@
+"""Contains the rendering of the static background of the window
+
+Text-based boards used to be drawn as one canvas item per wall, start and
+finish cell, and grids as one item per line, so large maps took seconds to
+open and slowed every later redraw of the canvas down. The board and its grid
+are instead rasterized into PNG tiles of `TILE_SIZE` pixels of the board at a
+given zoom, and only the tiles in the window are displayed, as one item each.
+Trajectories and candidate points are the only items drawn on top of them.
+Tiles are cached on disk, keyed by the content of the map, the sizes used to
+draw it, the zoom and their position. The least recently used tiles are
+removed once the cache exceeds its size.
+"""
+
+import os
+from hashlib import sha256
+from math import ceil, floor, sqrt
+from tempfile import mkstemp
+from typing import Callable, Optional
+
+from src.png import PNGImage, write_png
+from src.settings import BACKGROUND_CACHE_DIRECTORY, BACKGROUND_CACHE_SIZE, TILE_SIZE
+
+__all__ = ["BoardTiles", "ImageTiles"]
+
+VERSION = 2  # rendering of the tiles, part of their keys
+
+FILLS = {  # Tk colors of `graphic.COLORS`, as red, green, blue and opacity
+    "#": bytes((0, 255, 0, 255)),
+    ">": bytes((0, 139, 139, 255)),
+    "*": bytes((190, 190, 190, 255)),
+}
+LINE = bytes((0, 0, 0, 255))
+
+
+def draw_lines(rows: list[bytearray], bpp: int, xs: list[int], ys: list[int]) -> None:
+    """Draw black vertical lines on the columns `xs` and horizontal lines on
+    the rows `ys` of the pixels of `rows`, having `bpp` bytes each"""
+    line = LINE[:bpp]
+    width = len(rows[0]) // bpp if rows else 0
+    for y in ys:
+        rows[y][:] = line * width
+    for row in rows:
+        for x in xs:
+            row[x * bpp : (x + 1) * bpp] = line
+
+
+def grid(spacing: float, count: int, start: int, size: int) -> list[int]:
+    """Positions, from `start`, of the lines drawn every `spacing` pixels
+    among the first `count` ones that fall within `size` pixels"""
+    first = max(0, floor(start / spacing))
+    last = min(count - 1, ceil((start + size) / spacing))
+    lines = (round(k * spacing) - start for k in range(first, last + 1))
+    return [line for line in lines if 0 <= line < size]
+
+
+def rasterize_board(
+    board: list[str],
+    block_size: int,
+    radius: float,
+    zoom: float,
+    box: tuple[int, int, int, int],
+) -> list[bytearray]:
+    """Draw the part of a text-based board and its grid within `box`, like
+    `graphic.draw_board` and `graphic.draw_grid`, in a transparent image
+
+    Parameters
+    ----------
+    board : list[str]
+        board to draw, as parsed by `parse_map`
+    block_size : int
+        padding between each block
+    radius : float
+        radius of the discs drawn on walls, starts and ends, in blocks
+    zoom : float
+        number of pixels of the image per pixel of the board
+    box : tuple[int, int, int, int]
+        left, top, width and height of the image on the zoomed board
+
+    Returns
+    -------
+    list[bytearray]
+        red, green, blue and opacity components of the pixels, row by row
+    """
+    left, top, width, height = box
+    spacing = block_size * zoom
+    # discs are outlined by a one pixel wide line of their color
+    outer = block_size * radius * zoom + 0.5
+    first_x = max(0, floor((left - outer) / spacing))
+    last_x = ceil((left + width + outer) / spacing)
+
+    rows = []
+    for py in range(height):
+        row = bytearray(4 * width)
+        center = top + py + 0.5
+        # board lines whose discs cross this row, drawn in order
+        first = max(0, ceil((center - outer) / spacing))
+        last = min(len(board) - 1, floor((center + outer) / spacing))
+        for y in range(first, last + 1):
+            offset = center - y * spacing
+            half = sqrt(outer * outer - offset * offset)
+            line = board[y]
+            for x in range(first_x, min(len(line) - 1, last_x) + 1):
+                fill = FILLS.get(line[x])
+                if fill is None:
+                    continue
+                start = max(0, ceil(x * spacing - half - 0.5) - left)
+                stop = min(width, floor(x * spacing + half - 0.5) + 1 - left)
+                if start < stop:
+                    row[4 * start : 4 * stop] = fill * (stop - start)
+        rows.append(row)
+    draw_lines(
+        rows,
+        4,
+        grid(spacing, len(board[0]), left, width),
+        grid(spacing, len(board), top, height),
+    )
+    return rows
+
+
+def rasterize_image(
+    image: PNGImage, spacing: int, zoom: float, box: tuple[int, int, int, int]
+) -> list[bytearray]:
+    """Draw the part of an image-based board within `box`, scaled by `zoom`,
+    and its grid like `graphic.draw_grid`
+
+    Parameters
+    ----------
+    image : PNGImage
+        image of the board
+    spacing : int
+        space between each coordinates
+    zoom : float
+        number of pixels of the image drawn per pixel of `image`
+    box : tuple[int, int, int, int]
+        left, top, width and height of the image drawn on the zoomed board
+
+    Returns
+    -------
+    list[bytearray]
+        red, green and blue components of the pixels, row by row
+    """
+    left, top, width, height = box
+    source_width, source_height = image.width(), image.height()
+    # nearest pixel of `image` of each column
+    columns = [
+        min(source_width - 1, floor((left + x + 0.5) / zoom)) for x in range(width)
+    ]
+    rows = []
+    for y in range(top, top + height):
+        source = image.rows[min(source_height - 1, floor((y + 0.5) / zoom))]
+        rows.append(bytearray(b"".join(source[3 * x : 3 * x + 3] for x in columns)))
+    draw_lines(
+        rows,
+        3,
+        grid(spacing * zoom, source_width // spacing, left, width),
+        grid(spacing * zoom, source_height // spacing, top, height),
+    )
+    return rows
+
+
+def cached(key: str, render: Callable[[], tuple[int, list[bytes], bool]]) -> str:
+    """Path of the image cached under `key`, rendered and stored first if
+    missing. `render` returns the width, rows and opacity of the image"""
+    path = os.path.join(BACKGROUND_CACHE_DIRECTORY, f"{key}.png")
+    try:
+        os.utime(path)  # most recently used
+        return path
+    except OSError:
+        pass
+
+    width, rows, alpha = render()
+    os.makedirs(BACKGROUND_CACHE_DIRECTORY, exist_ok=True)
+    # written aside then renamed, so readers never see a partial file
+    descriptor, temporary = mkstemp(suffix=".tmp", dir=BACKGROUND_CACHE_DIRECTORY)
+    os.close(descriptor)
+    write_png(temporary, width, rows, alpha)
+    os.replace(temporary, path)
+    evict(path)
+    return path
+
+
+def evict(kept: str) -> None:
+    """Remove the least recently used images, but `kept`, until the cache
+    fits in its size"""
+    files = []
+    with os.scandir(BACKGROUND_CACHE_DIRECTORY) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".png") or entry.path == kept:
+                continue
+            try:
+                files.append((entry.path, entry.stat()))
+            except OSError:  # removed by another process meanwhile
+                pass
+    files.sort(key=lambda file: file[1].st_mtime)
+    total = os.path.getsize(kept) + sum(status.st_size for _, status in files)
+    for path, status in files:
+        if total <= BACKGROUND_CACHE_SIZE:
+            break
+        total -= status.st_size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class Tiles:
+    """Background of a board cut in tiles of `TILE_SIZE` pixels of the
+    zoomed board, rendered on first use then cached on disk
+
+    Attributes
+    ----------
+    width : float
+        width of the background in pixels at zoom 1
+    height : float
+        height of the background in pixels at zoom 1
+    key : str
+        hash of the content of the board and of the sizes used to draw it
+    alpha : bool
+        True if the tiles have transparent pixels
+    """
+
+    width = 0
+    height = 0
+    key = ""
+    alpha = False
+
+    def render(self, zoom: float, box: tuple[int, int, int, int]) -> list[bytes]:
+        """Draw a part of the board, implemented by every kind of tiles
+
+        Parameters
+        ----------
+        zoom : float
+            scale of the board, 1 being the size of `width` and `height`
+        box : tuple[int, int, int, int]
+            left, top, width and height on the zoomed board of the part drawn,
+            as returned by `box`
+
+        Returns
+        -------
+        list[bytes]
+            pixels of the part drawn, row by row, as red, green and blue
+            components followed by opacity if `alpha` is True
+        """
+        raise NotImplementedError
+
+    def box(self, zoom: float, column: int, row: int) -> tuple[int, int, int, int]:
+        """Left, top, width and height on the zoomed board of the tile at
+        `column` and `row`, which can be empty past the edges"""
+        left, top = column * TILE_SIZE, row * TILE_SIZE
+        width = min(TILE_SIZE, round(self.width * zoom) - left)
+        height = min(TILE_SIZE, round(self.height * zoom) - top)
+        return left, top, max(0, width), max(0, height)
+
+    def tile(self, zoom: float, column: int, row: int) -> Optional[str]:
+        """Path of the image of the tile at `column` and `row` of the board at
+        `zoom`, None if the tile is empty or can't be written"""
+        box = self.box(zoom, column, row)
+        if not box[2] or not box[3]:
+            return None
+        content = f"{VERSION}\n{self.key}\n{zoom}\n{column}\n{row}"
+        key = sha256(content.encode()).hexdigest()
+        try:
+            return cached(key, lambda: (box[2], self.render(zoom, box), self.alpha))
+        except (OSError, ValueError):
+            return None
+
+
+class BoardTiles(Tiles):
+    """Tiles of a text-based board and its grid, transparent elsewhere"""
+
+    alpha = True
+
+    def __init__(self, board: list[str], block_size: int, radius: float) -> None:
+        """Constructor of the 'BoardTiles' object
+
+        Parameters
+        ----------
+        board : list[str]
+            board to draw, as parsed by `parse_map`
+        block_size : int
+            padding between each block
+        radius : float
+            radius of the discs drawn on walls, starts and ends, in blocks
+        """
+        self.board = board
+        self.block_size = block_size
+        self.radius = radius
+        self.width = (len(board[0]) - 1) * block_size
+        self.height = (len(board) - 1) * block_size
+        content = "\n".join([str(block_size), repr(radius), *board])
+        self.key = sha256(content.encode()).hexdigest()
+
+    def render(self, zoom: float, box: tuple[int, int, int, int]) -> list[bytes]:
+        return rasterize_board(self.board, self.block_size, self.radius, zoom, box)
+
+
+class ImageTiles(Tiles):
+    """Tiles of an image-based board and its grid. The image is only decoded
+    if a tile is missing from the cache"""
+
+    def __init__(self, image_path: str, spacing: int, width: int, height: int) -> None:
+        """Constructor of the 'ImageTiles' object
+
+        Parameters
+        ----------
+        image_path : str
+            path to the image
+        spacing : int
+            space between each coordinates
+        width : int
+            width of the image
+        height : int
+            height of the image
+
+        Raises
+        ------
+        OSError
+            if the image can't be read
+        """
+        self.image_path = image_path
+        self.spacing = spacing
+        self.width = width
+        self.height = height
+        self.image = None
+        with open(image_path, "rb") as file:
+            digest = sha256(file.read()).hexdigest()
+        self.key = sha256(f"{spacing}\n{digest}".encode()).hexdigest()
+
+    def render(self, zoom: float, box: tuple[int, int, int, int]) -> list[bytes]:
+        if self.image is None:
+            self.image = PNGImage.open(self.image_path)
+        return rasterize_image(self.image, self.spacing, zoom, box)
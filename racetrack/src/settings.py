@@ -1,6 +1,8 @@
 """Contains the default values and parameters for the game
 """
 
+import os
+
 __all__ = [
     "DEFAULT_SPACING",
     "TEXT_MODE",
@@ -12,6 +14,20 @@ __all__ = [
     "BLOCK_SIZE",
     "RRADIUS",
     "PRADIUS",
+    "TABLE_SIZE",
+    "SEGMENT_CACHE_SIZE",
+    "SOLUTION_CACHE_DIRECTORY",
+    "SOLUTION_CACHE_SIZE",
+    "BACKGROUND_CACHE_DIRECTORY",
+    "BACKGROUND_CACHE_SIZE",
+    "ANYTIME_WEIGHTS",
+    "BEAM_WIDTH",
+    "FRAME_RATE",
+    "HEATMAP_RATE",
+    "WINDOW_SIZE",
+    "ZOOM_LEVELS",
+    "PAN_STEP",
+    "TILE_SIZE",
 ]
 
 DEFAULT_SPACING = 25
@@ -28,3 +44,24 @@ DEFAULT_RULE = LAX_RULE
 BLOCK_SIZE = 50
 RRADIUS = 0.75
 PRADIUS = 5
+
+TABLE_SIZE = 1 << 18  # default number of entries of transposition tables
+SEGMENT_CACHE_SIZE = 1 << 16  # segments remembered by strict-rule checks
+SOLUTION_CACHE_DIRECTORY = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "racetrack",
+    "solutions",
+)
+SOLUTION_CACHE_SIZE = 64 << 20  # bytes of solutions kept on disk
+BACKGROUND_CACHE_DIRECTORY = os.path.join(
+    os.path.dirname(SOLUTION_CACHE_DIRECTORY), "backgrounds"
+)
+BACKGROUND_CACHE_SIZE = 256 << 20  # bytes of rendered boards kept on disk
+ANYTIME_WEIGHTS = (10, 1.5, 1)  # heuristic weights of anytime searches
+BEAM_WIDTH = 1 << 10  # default number of nodes kept per depth by beam searches
+FRAME_RATE = 25  # trajectories drawn per second while a search is displayed
+HEATMAP_RATE = 2  # refreshes per second of the heatmap of a displayed search
+WINDOW_SIZE = (1280, 800)  # largest window, larger boards are panned and zoomed
+ZOOM_LEVELS = (0.125, 0.25, 0.5, 1, 2, 4)  # window pixels per board pixel
+PAN_STEP = 0.25  # part of the window scrolled by each arrow key
+TILE_SIZE = 512  # pixels of the side of the images the background is drawn in
@@ -1,141 +1,630 @@
 from collections import deque
+from functools import partial
+from operator import itemgetter
 from time import time
-from typing import Generator
-from heapq import heappush, heappop
-
-from lib import fltk
-from src import graphic
-from src.board import Cell, Board
-from src.settings import LAX_RULE
+from typing import Callable, Generator, Optional
+from heapq import nsmallest
+from math import inf
+
+from src.board import Cell, Board, neighbour
+from src.background import BackgroundSearch
+from src.buckets import BucketQueue, HeapQueue
+from src.cache import SolutionCache
+from src.graph import StateGraph
+from src.heuristic import FloodHeuristic, Heuristic
+from src.node import Node
+from src.parallel import parallel_search
+from src.heatmap import Heatmap
+from src.settings import (
+    ANYTIME_WEIGHTS,
+    BEAM_WIDTH,
+    FRAME_RATE,
+    HEATMAP_RATE,
+    LAX_RULE,
+    TABLE_SIZE,
+)
+from src.state import StateSpace
+from src.stats import SearchStats, SolveResult
 from src.tools import filter_positions, distance
-
-__all__ = ["SOLVERS", "solve", "fast_solve"]
-
-SearchType = Generator[list[Cell], None, list[Cell]]
-
-def format_time(seconds: float):
-    if seconds < 60:
-        return f"{seconds:.2f}s"
-    return f"{seconds // 60}m {seconds - 60*(seconds//60):.2f}s"
-
-def next_coords(board: Board, rule: str) -> set[Cell]:
+from src.transposition import TranspositionTable
+from src.vectorized import NUMPY_AVAILABLE, vectorized_search
+
+__all__ = ["SOLVERS", "solve", "fast_solve", "search"]
+
+SearchType = Generator[Node, None, list[Cell]]
+
+
+def graph_index(graph: StateGraph, node: Node) -> Optional[int]:
+    """Index of the state of `node` in `graph`, None if the state is not part
+    of it. A node created by `Node.child` from a node expanded on the graph
+    finds it among the successors of its parent instead of searching the
+    graph"""
+    if node.index is None:
+        parent = node.parent
+        if parent is not None and parent.index is not None:
+            node.index = graph.child(parent.index, node.position)
+        else:
+            node.index = graph.index(node.position, node.speed)
+    return node.index
+
+
+def next_coords(
+    board: Board, node: Node, rule: str, legal: Callable = filter_positions
+) -> set[Cell]:
+    if board.graph is not None and board.graph.rule == rule:
+        index = graph_index(board.graph, node)
+        if index is None:
+            return set()
+        return {coord for coord in board.graph.moves(index) if not node.visited(coord)}
+
+    coords = {
+        coord
+        for coord in board.successors(node.position, node.speed)
+        if not node.visited(coord)
+    }
     if rule == LAX_RULE:
-        return board.next_coords()
-    return filter_positions(board)
-
-
-def indepth_search(board: Board, rule: str) -> SearchType:
-    stack = deque([[coord] for coord in board.next_coords()])
-    done = set()
-    indepth_search.skip = 0
-    
-    while stack and not board.win():
-        board.trajectory = stack.pop()
-
-        yield board.trajectory
-
-        for coord in next_coords(board, rule):
-            new_traj = board.trajectory + [coord]
-            speed = board.speed(new_traj)
-            if (coord, speed) not in done:
-                done.add((coord, speed))
-                stack.append(new_traj)
-            else:
-                indepth_search.skip += 1
-    return board.trajectory
+        return coords
+    return legal(board, coords, node.position)
 
 
-def breadth_search(board: Board, rule: str) -> SearchType:
-    stack = deque([[coord] for coord in board.next_coords()])
-    done = set()
-    breadth_search.skip = 0
-    while stack and not board.win():
-        board.trajectory = stack.popleft()
+def expander(stats: SearchStats) -> Callable[[Board, Node, str], set[Cell]]:
+    """`next_coords`, measured as the successors phase when profiling, the
+    legality checks being measured apart"""
+    if not stats.profile:
+        return next_coords
+    legal = stats.timed("legality", filter_positions)
+    return partial(stats.timed("successors", next_coords), legal=legal)
 
-        yield board.trajectory
 
-        for coord in next_coords(board, rule):
-            new_traj = board.trajectory + [coord]
-            speed = board.speed(new_traj)
-            if (coord, speed) not in done:
-                done.add((coord, speed))
-                stack.append(new_traj)
-            else:
-                breadth_search.skip += 1
+def found(board: Board, node: Node) -> list[Cell]:
+    board.trajectory = node.trajectory()
     return board.trajectory
 
 
-def average_zone(coords: set[Cell]) -> Cell:
-    x, y = 0, 0
-    for coord in coords:
-        x += coord.x
-        y += coord.y
-    return Cell(x // len(coords), y // len(coords))
-
+def indepth_search(board: Board, rule: str, stats: SearchStats = None) -> SearchType:
+    stats = SearchStats() if stats is None else stats
+    stack = deque(Node(start) for start in board.start)
+    space = StateSpace(board)
+    done = space.bitset()
+    key = space.encode
+    successors = expander(stats)
+    seen = stats.timed("duplicates", done.__contains__)
+    push, pop = stats.timed("queue", stack.append), stats.timed("queue", stack.pop)
 
-def astar(board: Board, rule: str) -> SearchType:
-    heap = []
-    average_finish_zone = average_zone(board.end)
-    done = set()
-    astar.skip = 0
-
-    for start in board.start:
-        heappush(heap, (distance(start, average_finish_zone), [start]))
+    while stack:
+        stats.frontier = max(stats.frontier, len(stack))
+        node = pop()
 
-    while heap and not board.win():
-        _, board.trajectory = heappop(heap)
+        yield node
 
-        yield board.trajectory
+        if node.position in board.end:
+            return found(board, node)
 
-        for coord in next_coords(board, rule):
-            new_traj = board.trajectory + [coord]
-            speed = board.speed(new_traj)
-            if (coord, speed) not in done:
-                done.add((coord, speed))
-                heappush(heap, (distance(coord, average_finish_zone), new_traj))
+        for coord in successors(board, node, rule):
+            child = node.child(coord)
+            state = key(coord, child.speed)
+            if not seen(state):
+                done.add(state)
+                push(child)
             else:
-                astar.skip += 1
-    return board.trajectory
-
-def greedy(board: Board, rule: str) -> SearchType:
-    heap = [(0, [start]) for start in board.start]
-    done = set()
-    greedy.skip = 0
+                stats.skip += 1
+    return None
+
+
+def breadth_search(board: Board, rule: str, stats: SearchStats = None) -> SearchType:
+    stats = SearchStats() if stats is None else stats
+    stats.optimal = True
+    stack = deque(Node(start) for start in board.start)
+    space = StateSpace(board)
+    done = space.bitset()
+    key = space.encode
+    successors = expander(stats)
+    seen = stats.timed("duplicates", done.__contains__)
+    push, pop = stats.timed("queue", stack.append), stats.timed("queue", stack.popleft)
+    while stack:
+        stats.frontier = max(stats.frontier, len(stack))
+        node = pop()
+
+        yield node
+
+        if node.position in board.end:
+            return found(board, node)
+
+        for coord in successors(board, node, rule):
+            child = node.child(coord)
+            state = key(coord, child.speed)
+            if not seen(state):
+                done.add(state)
+                push(child)
+            else:
+                stats.skip += 1
+    return None
+
+
+def astar(
+    board: Board,
+    rule: str,
+    heuristic: type[Heuristic] = FloodHeuristic,
+    stats: SearchStats = None,
+) -> SearchType:
+    """Expand nodes by increasing `depth + heuristic`, last pushed first on
+    ties so deeper nodes come first. The solution is optimal when the
+    heuristic is admissible. States estimated infinitely far from the finish
+    line are never pushed"""
+    stats = SearchStats() if stats is None else stats
+    estimate = heuristic(board, rule)
+    queue = BucketQueue(lifo=True)
+    best = {}
+    key = StateSpace(board).encode
+    stats.optimal = estimate.admissible
+    successors = expander(stats)
+    lookup = stats.timed("duplicates", best.get)
+    push, pop = stats.timed("queue", queue.push), stats.timed("queue", queue.pop)
 
-    while heap and not board.win():
-        _, board.trajectory = heappop(heap)
+    for start in board.start:
+        cost = estimate(start, Cell(0, 0))
+        if cost != inf:
+            best[key(start, Cell(0, 0))] = 0
+            queue.push(cost, Node(start))
+
+    while queue:
+        stats.frontier = max(stats.frontier, len(queue))
+        node = pop()
+        if lookup(key(node.position, node.speed)) < node.depth:
+            stats.skip += 1
+            continue
+
+        yield node
+
+        if node.position in board.end:
+            return found(board, node)
+
+        for coord in successors(board, node, rule):
+            child = node.child(coord)
+            state = key(coord, child.speed)
+            if child.depth < lookup(state, child.depth + 1):
+                best[state] = child.depth
+                cost = estimate(coord, child.speed)
+                if cost != inf:
+                    push(child.depth + cost, child)
+            else:
+                stats.skip += 1
+    return None
 
-        yield board.trajectory
+def greedy(board: Board, rule: str, stats: SearchStats = None) -> SearchType:
+    stats = SearchStats() if stats is None else stats
+    queue = HeapQueue()
+    for start in board.start:
+        queue.push(0, Node(start))
+    space = StateSpace(board)
+    done = space.bitset()
+    key = space.encode
+    successors = expander(stats)
+    seen = stats.timed("duplicates", done.__contains__)
+    push, pop = stats.timed("queue", queue.push), stats.timed("queue", queue.pop)
+
+    while queue:
+        stats.frontier = max(stats.frontier, len(queue))
+        node = pop()
+
+        yield node
+
+        if node.position in board.end:
+            return found(board, node)
+
+        for coord in successors(board, node, rule):
+            child = node.child(coord)
+            state = key(coord, child.speed)
+            if not seen(state):
+                done.add(state)
+                push(-distance(node.position, coord), child)
+            else:
+                stats.skip += 1
+    return None
 
-        for coord in next_coords(board, rule):
-            new_traj = board.trajectory + [coord]
-            speed = board.speed(new_traj)
-            if (coord, speed) not in done:
-                done.add((coord, speed))
-                heappush(heap, (-distance(board.trajectory[-1], coord), new_traj))
+def greedy2(board: Board, rule: str, stats: SearchStats = None) -> SearchType:
+    stats = SearchStats() if stats is None else stats
+    queue = HeapQueue()
+    for start in board.start:
+        queue.push((1, 0), Node(start))
+    space = StateSpace(board)
+    done = space.bitset()
+    key = space.encode
+    successors = expander(stats)
+    seen = stats.timed("duplicates", done.__contains__)
+    push, pop = stats.timed("queue", queue.push), stats.timed("queue", queue.pop)
+
+    while queue:
+        stats.frontier = max(stats.frontier, len(queue))
+        node = pop()
+
+        yield node
+
+        if node.position in board.end:
+            return found(board, node)
+
+        for coord in successors(board, node, rule):
+            child = node.child(coord)
+            state = key(coord, child.speed)
+            if not seen(state):
+                done.add(state)
+                speed = distance(node.position, coord)
+                push((-child.depth - 1, -speed), child)
             else:
-                greedy.skip += 1
-    return board.trajectory
+                stats.skip += 1
+    return None
 
-def greedy2(board: Board, rule: str) -> SearchType:
-    heap = [(1, 0, [start]) for start in board.start]
-    done = set()
-    greedy2.skip = 0
 
-    while heap and not board.win():
-        _, _, board.trajectory = heappop(heap)
+def arrivals(board: Board, rule: str) -> Generator[Node, None, None]:
+    """States of a car crossing the finish line that a forward search can
+    produce. The car comes from a legal cell that is not on the finish line,
+    where its trajectory would have ended, and its speed can be reached from
+    rest on the board. With a graph compiled for `rule`, the state must also
+    be reachable from the starting line"""
+    if not board.end:
+        return
+    space = StateSpace(board)
+    graph = board.graph
+    if graph is not None and graph.rule != rule:
+        graph = None
+    for end in board.end:
+        for x in range(-space.max_vx, space.max_vx + 1):
+            for y in range(-space.max_vy, space.max_vy + 1):
+                origin, speed = Cell(end.x - x, end.y - y), Cell(x, y)
+                if origin not in board.legal or origin in board.end:
+                    continue
+                if not space.reachable_at(end, speed):
+                    continue
+                if graph is None or graph.index(end, speed) is not None:
+                    yield Node(end, speed)
+
+
+def previous_states(
+    board: Board, node: Node, rule: str, legal: Callable = filter_positions
+) -> list[Node]:
+    """Reverse of `next_coords`: nodes whose successors contain `node`. The
+    parent of the returned nodes is `node`, as the backward search grows
+    from the finish line"""
+    origin = Cell(node.position.x - node.speed.x, node.position.y - node.speed.y)
+    if origin not in board.legal or origin in board.end or node.visited(origin):
+        return []  # a trajectory ends on the first finish cell it reaches
+    if board.graph is not None and board.graph.rule == rule:
+        target = (node.position, node.speed)
+        return [
+            Node(origin, node.speed + offset, node)
+            for offset in neighbour
+            if board.graph.has_edge((origin, node.speed + offset), target)
+        ]
+    if rule != LAX_RULE and not legal(board, {node.position}, origin):
+        return []
+    return [Node(origin, node.speed + offset, node) for offset in neighbour]
+
+
+def join(forward: Node, backward: Node) -> list[Cell]:
+    """Concatenate the trajectories meeting at the state of both nodes, None if
+    the resulting trajectory goes twice through the same cell"""
+    tail = []
+    node = backward.parent
+    while node is not None:
+        if forward.visited(node.position):
+            return None
+        tail.append(node.position)
+        node = node.parent
+    return forward.trajectory() + tail
+
+
+def bidirectional_search(
+    board: Board, rule: str, stats: SearchStats = None
+) -> SearchType:
+    """Breadth first searches growing from the starting line and backward from
+    the finish line, one full level at a time on the smallest frontier. The
+    first trajectory found where they meet is optimal. The backward search
+    starts from every arrival state a car could reach, pruned by `arrivals`,
+    which is still many states on a wide finish line: it saves at most a
+    few times the states expanded by `breadth_search`, most with a compiled
+    graph, which keeps only states reachable from the start"""
+    stats = SearchStats() if stats is None else stats
+    space = StateSpace(board)
+    key = space.encode
+    forward, backward = {}, {}
+    for node in map(Node, board.start):
+        forward[key(node.position, node.speed)] = node
+    for node in arrivals(board, rule):
+        backward[key(node.position, node.speed)] = node
+    forward_front, backward_front = list(forward.values()), list(backward.values())
+    forward_depth, backward_depth = 0, 0
+    stats.optimal = True
+    stats.frontier = len(forward_front) + len(backward_front)
+    successors = expander(stats)
+    predecessors = previous_states
+    if stats.profile:
+        legal = stats.timed("legality", filter_positions)
+        predecessors = partial(stats.timed("successors", previous_states), legal=legal)
+    forward_seen = stats.timed("duplicates", forward.__contains__)
+    backward_seen = stats.timed("duplicates", backward.__contains__)
+
+    solution = None
+    for state, node in forward.items():
+        if state in backward:
+            solution = join(node, backward[state]) or solution
+
+    while (
+        forward_front
+        and backward_front
+        and (solution is None or len(solution) > forward_depth + backward_depth + 2)
+    ):
+        front = []
+        if len(forward_front) <= len(backward_front):
+            for node in forward_front:
+                yield node
+                for coord in successors(board, node, rule):
+                    child = node.child(coord)
+                    state = key(coord, child.speed)
+                    if forward_seen(state):
+                        stats.skip += 1
+                        continue
+                    forward[state] = child
+                    front.append(child)
+                    if state in backward:
+                        path = join(child, backward[state])
+                        if path and (solution is None or len(path) < len(solution)):
+                            solution = path
+            forward_front = front
+            forward_depth += 1
+        else:
+            for node in backward_front:
+                yield node
+                for parent in predecessors(board, node, rule):
+                    if not space.reachable_at(parent.position, parent.speed):
+                        continue  # too fast to be reached from the start
+                    state = key(parent.position, parent.speed)
+                    if backward_seen(state):
+                        stats.skip += 1
+                        continue
+                    backward[state] = parent
+                    front.append(parent)
+                    if state in forward:
+                        path = join(forward[state], parent)
+                        if path and (solution is None or len(path) < len(solution)):
+                            solution = path
+            backward_front = front
+            backward_depth += 1
+        stats.frontier = max(
+            stats.frontier, len(forward_front) + len(backward_front)
+        )
+
+    if solution is not None:
+        board.trajectory = solution
+    return solution
+
+
+def ida_star(
+    board: Board,
+    rule: str,
+    heuristic: type[Heuristic] = FloodHeuristic,
+    table_size: int = TABLE_SIZE,
+    stats: SearchStats = None,
+) -> SearchType:
+    """Depth first searches bounded by `depth + heuristic`, the bound being
+    raised to the smallest exceeding cost after each iteration. Only the
+    current branch is kept in memory, with an optional transposition table of
+    `table_size` entries to prune duplicate states. The estimate of every
+    node is computed once, when it is generated, and children are tried by
+    increasing estimate"""
+    stats = SearchStats() if stats is None else stats
+    estimate = heuristic(board, rule)
+    table = TranspositionTable(table_size) if table_size else None
+    key = StateSpace(board).encode
+    starts = sorted(
+        ((estimate(start, Cell(0, 0)), Node(start)) for start in board.start),
+        key=itemgetter(0),
+    )
+    bound = starts[0][0] if starts else None
+    stats.optimal = estimate.admissible
+    successors = expander(stats)
+    visit = stats.timed("duplicates", table.visit) if table is not None else None
+
+    while bound is not None and bound < inf:  # else no start reaches the end
+        exceeded = None
+        if table is not None:
+            table.next_iteration()
+        stack = [iter(starts)]
+        while stack:
+            pair = next(stack[-1], None)
+            if pair is None:
+                stack.pop()
+                continue
+
+            cost, node = pair
+            cost += node.depth
+            if cost > bound:
+                exceeded = cost if exceeded is None else min(exceeded, cost)
+                continue
+            state = key(node.position, node.speed)
+            if visit is not None and not visit(state, node.depth):
+                stats.skip += 1
+                continue
+
+            yield node
+
+            if node.position in board.end:
+                return found(board, node)
+
+            children = []
+            for coord in successors(board, node, rule):
+                child = node.child(coord)
+                children.append((estimate(coord, child.speed), child))
+            children.sort(key=itemgetter(0))
+            stack.append(iter(children))
+            stats.frontier = max(stats.frontier, len(stack))
+        bound = exceeded
+    return None
+
+
+def anytime_search(
+    board: Board,
+    rule: str,
+    heuristic: type[Heuristic] = FloodHeuristic,
+    stats: SearchStats = None,
+) -> SearchType:
+    """Anytime repairing A*: weighted A* searches expanding nodes by increasing
+    `depth + weight * heuristic`, the weight decreasing along
+    `ANYTIME_WEIGHTS`. A trajectory is recorded as soon as a node reaching the
+    finish line is generated, and each search stops once no waiting node can
+    lead to a shorter one. The open list and the best depths are kept from one
+    weight to the next: only the states reached by a shorter path after their
+    expansion are expanded again, so every search resumes the previous one.
+    Every improvement, of the trajectory or of its bound over the optimal
+    number of moves, is recorded in `stats`, so the search can be stopped at
+    any time. The last trajectory is optimal when the heuristic is
+    admissible"""
+    stats = SearchStats() if stats is None else stats
+    estimate = heuristic(board, rule)
+    admissible = estimate.admissible
+    key = StateSpace(board).encode
+    successors = expander(stats)
+    best = {}  # lowest depth found for each state
+    lookup = stats.timed("duplicates", best.get)
+    waiting = []  # estimate and node of the states to expand at the next weight
+    for start in board.start:
+        cost = estimate(start, Cell(0, 0))
+        if cost != inf:
+            best[key(start, Cell(0, 0))] = 0
+            waiting.append((cost, Node(start)))
+
+    solution, moves = None, inf
+    lower = min((cost for cost, _ in waiting), default=0) if admissible else 0
+    for weight in ANYTIME_WEIGHTS:
+        queue = HeapQueue()
+        push, pop = stats.timed("queue", queue.push), stats.timed("queue", queue.pop)
+        for cost, node in waiting:
+            if node.depth + cost < moves:
+                push((node.depth + weight * cost, -node.depth), (cost, node))
+        waiting, closed = [], set()  # states expanded at this weight
+
+        while queue and queue.peek()[0][0] < moves:
+            stats.frontier = max(stats.frontier, len(queue))
+            cost, node = pop()
+            state = key(node.position, node.speed)
+            if best[state] < node.depth or node.depth + cost >= moves:
+                stats.skip += 1
+                continue
+            closed.add(state)
+
+            yield node
+
+            for coord in successors(board, node, rule):
+                child = node.child(coord)
+                state = key(coord, child.speed)
+                if child.depth >= lookup(state, child.depth + 1):
+                    stats.skip += 1
+                    continue
+                cost = estimate(coord, child.speed)
+                if child.depth + cost >= moves:
+                    stats.skip += 1
+                    continue
+                best[state] = child.depth
+                if coord in board.end:
+                    solution, moves = child.trajectory(), child.depth
+                    stats.improve(solution, suboptimality(moves, lower, admissible))
+                elif state in closed:
+                    waiting.append((cost, child))
+                else:
+                    push((child.depth + weight * cost, -child.depth), (cost, child))
+
+        waiting.extend(entry for _, entry in queue)
+        waiting = [
+            (cost, node)
+            for cost, node in waiting
+            if best[key(node.position, node.speed)] == node.depth
+        ]
+        if admissible and solution is not None:
+            bound = min((cost + node.depth for cost, node in waiting), default=moves)
+            if min(bound, moves) > lower:
+                lower = min(bound, moves)
+                stats.improve(solution, suboptimality(moves, lower, admissible))
+        if not waiting or lower >= moves:
+            break
+
+    stats.optimal = admissible and solution is not None and lower >= moves
+    if solution is not None:
+        board.trajectory = solution
+    return solution
+
+
+def beam_search(
+    board: Board,
+    rule: str,
+    heuristic: type[Heuristic] = FloodHeuristic,
+    beam_width: int = BEAM_WIDTH,
+    stats: SearchStats = None,
+) -> SearchType:
+    """Breadth first search keeping, at each depth, only the `beam_width`
+    nodes with the lowest heuristic. Only the states kept in the beam are
+    remembered as duplicates, at most `beam_width` per depth, in a paged
+    `StateSet`: memory grows with the depth of the search and the pages its
+    states fall in rather than with the size of the board, but it does grow.
+    Pruned nodes are counted in `stats`, and the bound of
+    the solution over the optimal number of moves is recorded when the
+    heuristic is admissible: the solution is optimal if no pruned node could
+    have led to a shorter one"""
+    stats = SearchStats() if stats is None else stats
+    estimate = heuristic(board, rule)
+    successors = expander(stats)
+    rank = stats.timed("queue", nsmallest)
+    lower = None  # lowest depth + heuristic of the pruned nodes
+    layer = [(estimate(start, Cell(0, 0)), Node(start)) for start in board.start]
+    space = StateSpace(board)
+    done = space.bitset()
+    key = space.encode
+    seen = stats.timed("duplicates", done.__contains__)
+
+    while layer:
+        if len(layer) > beam_width:
+            stats.pruned += len(layer) - beam_width
+            layer = rank(beam_width + 1, layer, key=lambda entry: entry[0])
+            cost, node = layer.pop()
+            if lower is None or node.depth + cost < lower:
+                lower = node.depth + cost
+        stats.frontier = max(stats.frontier, len(layer))
+        for _, node in layer:
+            done.add(key(node.position, node.speed))
+
+        children = {}
+        for _, node in layer:
+            yield node
+
+            if node.position in board.end:
+                solution = found(board, node)
+                if lower is None:
+                    stats.optimal = True
+                else:
+                    bound = suboptimality(
+                        node.depth, min(lower, node.depth), estimate.admissible
+                    )
+                    stats.optimal = bound == 1.0
+                    stats.improve(solution, bound)
+                return solution
+
+            for coord in successors(board, node, rule):
+                child = node.child(coord)
+                state = key(coord, child.speed)
+                if not seen(state) and state not in children:
+                    children[state] = (estimate(coord, child.speed), child)
+                else:
+                    stats.skip += 1
+        layer = list(children.values())
+    return None
 
-        yield board.trajectory
 
-        for coord in next_coords(board, rule):
-            new_traj = board.trajectory + [coord]
-            speed = board.speed(new_traj)
-            if (coord, speed) not in done:
-                done.add((coord, speed))
-                heappush(heap, (-len(new_traj), -distance(board.trajectory[-1], coord), new_traj))
-            else:
-                greedy2.skip += 1
-    return board.trajectory
+def suboptimality(moves: int, lower: int, admissible: bool) -> Optional[float]:
+    """Bound of `moves` over the optimal number of moves, known to be at least
+    `lower`, None if the lower bound comes from an inadmissible heuristic"""
+    if not admissible:
+        return None
+    if not moves:
+        return 1.0
+    return moves / max(lower, 1)
 
 
 SOLVERS = {
@@ -143,17 +632,189 @@ SOLVERS = {
     "breadth": breadth_search,
     "astar": astar,
     "greedy": greedy,
-    "greedy2": greedy2
+    "greedy2": greedy2,
+    "bidirectional": bidirectional_search,
+    "ida": ida_star,
+    "anytime": anytime_search,
+    "beam": beam_search,
+    "parallel": parallel_search,
 }
+if NUMPY_AVAILABLE:
+    SOLVERS["vectorized"] = vectorized_search
+
+
+def search(
+    board: Board,
+    solver: callable,
+    rule: str,
+    profile: bool = False,
+    cache: SolutionCache = None,
+    deadline: float = None,
+    on_solution: Callable[[list[Cell], Optional[float]], None] = None,
+    **options,
+) -> SolveResult:
+    """Run `solver` to the end, or until `deadline`, without any display
+
+    Parameters
+    ----------
+    board : Board
+        board to solve
+    solver : callable
+        one of `SOLVERS`
+    rule : str
+        type of rule to apply to movements (`LAX_RULE` or `STRICT_RULE`)
+    profile : bool, optional
+        measure the time spent in each phase of the search, by default False
+    cache : SolutionCache, optional
+        results of previous searches, returned instead of searching again
+        and completed with the new ones, by default None
+    deadline : float, optional
+        seconds after which the search is stopped, the best trajectory found
+        so far by an anytime solver being returned, by default None
+    on_solution : Callable[[list[Cell], float], None], optional
+        called with each trajectory found by an anytime solver and the bound
+        of its number of moves over the optimal one, by default None
+
+    Returns
+    -------
+    SolveResult
+        outcome of the search
+    """
+    if cache is not None:
+        res = cache.get(board, solver.__name__, rule, options)
+        if res is not None:
+            return res
+
+    stats = SearchStats(profile, on_solution)
+    gen = solver(board, rule, stats=stats, **options)
+
+    start = time()
+    attempt = 0
+    interrupted = False
+
+    while True:
+        if deadline is not None and time() - start >= deadline:
+            solution, interrupted = interrupt(board, gen, stats), True
+            break
+        try:
+            next(gen)
+            attempt += 1
+        except StopIteration as stop:
+            solution = stop.value
+            break
+
+    duration = time() - start
+    res = result(board, solver, rule, solution, duration, attempt, stats, interrupted)
+    if cache is not None:
+        cache.put(board, res, options)
+    return res
+
+
+def result(
+    board: Board,
+    solver: callable,
+    rule: str,
+    solution: Optional[list[Cell]],
+    duration: float,
+    attempt: int,
+    stats: SearchStats,
+    interrupted: bool = False,
+) -> SolveResult:
+    segments = None
+    if board.segments is not None:
+        segments = (board.segments.hits, board.segments.misses)
+    return SolveResult(
+        solver.__name__,
+        rule,
+        solution,
+        duration,
+        attempt,
+        stats,
+        segments,
+        interrupted=interrupted,
+    )
+
+
+def interrupt(
+    board: Board, gen: SearchType, stats: SearchStats
+) -> Optional[list[Cell]]:
+    """Stop the search `gen` and return the best trajectory it found so far"""
+    gen.close()
+    if not stats.solutions:
+        return None
+    board.trajectory = stats.solutions[-1][0]
+    return board.trajectory
 
 
-def solve(board: Board, solver: callable, c_time: bool, rule: str) -> None:
-    gen = solver(board, rule)
-    tags = []
+def solve(
+    board: Board,
+    solver: callable,
+    rule: str,
+    profile: bool = False,
+    cache: SolutionCache = None,
+    deadline: float = None,
+    heatmap: bool = False,
+    **options,
+) -> Optional[SolveResult]:
+    """Display the search while it runs in the background, the last node it
+    expanded being drawn `FRAME_RATE` times per second. Space pauses or
+    resumes it, Return expands one node while paused. With `heatmap`, the
+    number of expansions of each position is shown over the board, refreshed
+    `HEATMAP_RATE` times per second. A result found in `cache` is drawn at once.
+    The best trajectory found so far by an anytime solver stays drawn with
+    its bound, and is returned when `deadline` seconds of search are spent.
+    Arrows and plus or minus move the viewport meanwhile
+
+    Returns
+    -------
+    SolveResult
+        outcome of the search, None if the window was closed before the end
+    """
+    from lib import fltk
+    from src import graphic
+
+    if cache is not None:
+        res = cache.get(board, solver.__name__, rule, options)
+        if res is not None:
+            graphic.TrajectoryRenderer(board).draw(board.trajectory)
+            return res
+
+    stats = SearchStats(profile)
+    gen = solver(board, rule, stats=stats, **options)
+    renderer = graphic.TrajectoryRenderer(board)
+    draw = stats.timed("rendering", renderer.draw)
+    draw_best = stats.timed("rendering", graphic.draw_solution)
+    erase = stats.timed("rendering", graphic.erase_tags)
+    update = stats.timed("rendering", fltk.mise_a_jour)
+    best, shown, drawn = [], 0, None
+
+    def redraw_best() -> None:
+        nonlocal best
+        if shown:
+            erase(best)
+            best = draw_best(board, *stats.solutions[shown - 1])
+
+    graphic.view.watch(redraw_best)
     tev = None
-    pause, step = False, False
-    start, sum_time, attempt = time(), 0, 0
-    while tev != "Quitte" and not board.win():
+    pause, interrupted = False, False
+    start, sum_time, frame = time(), 0, 0
+    counts = Heatmap(board) if heatmap else None
+    if counts is not None:
+        overlay = graphic.HeatmapOverlay(board, counts)
+        draw_heatmap = stats.timed("rendering", overlay.draw)
+        refresh, counted = 0, 0
+    task = BackgroundSearch(gen, stats, counts)
+    task.start()
+    while tev != "Quitte":
+        spent = sum_time if pause else time() - start + sum_time
+        if deadline is not None and spent >= deadline:
+            task.stop()
+            solution, interrupted = interrupt(board, gen, stats), True
+            break
+        if task.done:
+            solution = task.result()
+            break
+
         ev = fltk.donne_ev()
         tev = fltk.type_ev(ev)
         if tev == "Touche":
@@ -161,48 +822,72 @@ def solve(board: Board, solver: callable, c_time: bool, rule: str) -> None:
             if touche == "space":
                 pause = not pause
                 if pause:
-                    sum_time = time() - start
+                    task.pause()
+                    sum_time += time() - start
                 else:
+                    task.resume()
                     start = time()
             elif touche == "Return":
-                step = True
-
-        if step or not pause:
-            try:
-                next(gen)
-                attempt += 1
-            except StopIteration:
-                ...
-
-        step = False
-        graphic.erase_tags(tags)
-        tags = graphic.draw_trajectory(board)
-        fltk.mise_a_jour()
+                task.step()
+            else:
+                graphic.navigate(touche)
+
+        if counts is not None and task.attempts > counted and time() >= refresh:
+            refresh, counted = time() + 1 / HEATMAP_RATE, task.attempts
+            draw_heatmap()
+        # the search runs meanwhile, only its last node is drawn per frame
+        node = task.node
+        if node is not drawn and time() >= frame:
+            frame = time() + 1 / FRAME_RATE
+            drawn = node
+            if len(stats.solutions) > shown:
+                shown = len(stats.solutions)
+                erase(best)
+                best = draw_best(board, *stats.solutions[-1])
+            board.trajectory = node.trajectory()
+            draw(board.trajectory)
+        update()
+    graphic.view.unwatch(redraw_best)
+    if counts is not None:
+        if tev != "Quitte":
+            # kept displayed, and following the viewport, until the window closes
+            overlay.draw()
+        else:
+            overlay.close()
     if tev == "Quitte":
-        return
-    
-    print(f"Solution found in {len(board.trajectory)} positions")
-    if c_time:
-        print(f"Solved in {format_time(time() - start + sum_time)} in {attempt} attempts")
-        print(f"Skiped {solver.skip} positions")
-
-    graphic.wait_exit()
-
-
-def fast_solve(board: Board, solver: callable, c_time: bool, rule: str) -> None:
-    gen = solver(board, rule)
-
-    start = time()
-    attempt = 0
-
-    while not board.win():
-        next(gen)
-        attempt += 1
-
-    print(f"Solution found in {len(board.trajectory)} positions")
-    if c_time:
-        print(f"Solved in {format_time(time() - start)} in {attempt} attempts")
-        print(f"Skiped {solver.skip} positions")
-
-    graphic.draw_trajectory(board)
-    graphic.wait_exit()
+        task.stop()
+        gen.close()
+        return None
+
+    duration = sum_time if pause else time() - start + sum_time
+    attempt = task.attempts
+    board.trajectory = solution or []
+    graphic.erase_tags(best)
+    renderer.draw(board.trajectory)
+    res = result(board, solver, rule, solution, duration, attempt, stats, interrupted)
+    if cache is not None:
+        cache.put(board, res, options)
+    return res
+
+
+def fast_solve(
+    board: Board,
+    solver: callable,
+    rule: str,
+    profile: bool = False,
+    cache: SolutionCache = None,
+    deadline: float = None,
+    **options,
+) -> SolveResult:
+    """Run the search without displaying it, then draw the solution
+
+    Returns
+    -------
+    SolveResult
+        outcome of the search
+    """
+    from src import graphic
+
+    res = search(board, solver, rule, profile, cache, deadline, **options)
+    graphic.TrajectoryRenderer(board).draw(board.trajectory)
+    return res
@@ -0,0 +1,136 @@
+"""Contains the dense encoding of the search states of a board
+
+A state is a position and a speed. Positions are bounded by the legal cells of
+the board, and speeds by the highest speed a car starting at rest can reach
+on it, so every state is numbered by a single int lower than the number of
+states of the board. Solvers key their tables on these ints instead of tuples
+of cells, which are neither hashed nor kept alive, and store their closed
+sets as bitsets holding one bit per state. Bitsets are split in pages that
+are only allocated once one of their states is added, so a search touching
+few states of a large board only pays for the pages it reaches.
+"""
+
+from src.board import Cell, Board
+from src.tools import max_speed
+
+__all__ = ["StateSpace", "StateSet"]
+
+PAGE_BITS = 15  # a page of a `StateSet` holds 2 ** PAGE_BITS states, 4 KiB
+PAGE_MASK = (1 << PAGE_BITS) - 1
+
+
+class StateSpace:
+    """Numbering of every (position, speed) state of a board
+
+    Attributes
+    ----------
+    min_x : int
+        lowest abscissa of the legal cells
+    min_y : int
+        lowest ordinate of the legal cells
+    width : int
+        number of columns spanned by the legal cells
+    height : int
+        number of rows spanned by the legal cells
+    max_vx : int
+        highest absolute horizontal speed reachable
+    max_vy : int
+        highest absolute vertical speed reachable
+    size : int
+        number of states, every key is lower than `size`
+    """
+
+    __slots__ = ("min_x", "min_y", "width", "height", "max_vx", "max_vy", "size")
+
+    def __init__(self, board: Board) -> None:
+        """Constructor of the 'StateSpace' object
+
+        Parameters
+        ----------
+        board : Board
+            board whose states are numbered
+        """
+        xs = [cell.x for cell in board.legal] or [0]
+        ys = [cell.y for cell in board.legal] or [0]
+        self.min_x, self.min_y = min(xs), min(ys)
+        self.width = max(xs) - self.min_x + 1
+        self.height = max(ys) - self.min_y + 1
+        self.max_vx = max_speed(self.width - 1)
+        self.max_vy = max_speed(self.height - 1)
+        self.size = (
+            self.width * self.height * (2 * self.max_vx + 1) * (2 * self.max_vy + 1)
+        )
+
+    def reachable(self, speed: Cell) -> bool:
+        """Check if a car starting at rest can reach `speed` on the board,
+        only the states with such a speed having a key"""
+        return abs(speed.x) <= self.max_vx and abs(speed.y) <= self.max_vy
+
+    def reachable_at(self, position: Cell, speed: Cell) -> bool:
+        """Check if a car starting at rest can be at `position` moving at
+        `speed`. Since it last stood still along an axis, the car went through
+        every lower speed in that direction, so reaching speed `n` takes a
+        run-up of at least `n(n+1)/2` cells of the board behind it"""
+        x = position.x - self.min_x
+        y = position.y - self.min_y
+        run_x = x if speed.x > 0 else self.width - 1 - x
+        run_y = y if speed.y > 0 else self.height - 1 - y
+        return (
+            abs(speed.x) * (abs(speed.x) + 1) // 2 <= run_x
+            and abs(speed.y) * (abs(speed.y) + 1) // 2 <= run_y
+        )
+
+    def encode(self, position: Cell, speed: Cell) -> int:
+        """Key of the state of a car at `position` moving at a reachable
+        `speed`"""
+        return (
+            ((speed.x + self.max_vx) * (2 * self.max_vy + 1) + speed.y + self.max_vy)
+            * self.height
+            + position.y
+            - self.min_y
+        ) * self.width + position.x - self.min_x
+
+    def decode(self, key: int) -> tuple[Cell, Cell]:
+        """Position and speed of the state numbered `key`"""
+        key, x = divmod(key, self.width)
+        key, y = divmod(key, self.height)
+        vx, vy = divmod(key, 2 * self.max_vy + 1)
+        return (
+            Cell(x + self.min_x, y + self.min_y),
+            Cell(vx - self.max_vx, vy - self.max_vy),
+        )
+
+    def bitset(self) -> "StateSet":
+        """Empty set able to hold every state of the board"""
+        return StateSet()
+
+
+class StateSet:
+    """Set of state keys stored as one bit per state, in pages of
+    2 ** `PAGE_BITS` states allocated on the first state added to them
+
+    Attributes
+    ----------
+    pages : dict[int, bytearray]
+        pages by `key >> PAGE_BITS`. Bit `key % 8` of byte
+        `(key & PAGE_MASK) // 8` is set if the state `key` is in the set
+    """
+
+    __slots__ = ("pages",)
+
+    def __init__(self) -> None:
+        self.pages = {}
+
+    def add(self, key: int) -> None:
+        page = self.pages.get(key >> PAGE_BITS)
+        if page is None:
+            page = self.pages[key >> PAGE_BITS] = bytearray(1 << PAGE_BITS - 3)
+        page[(key & PAGE_MASK) >> 3] |= 1 << (key & 7)
+
+    def __contains__(self, key: int) -> bool:
+        page = self.pages.get(key >> PAGE_BITS)
+        return page is not None and page[(key & PAGE_MASK) >> 3] >> (key & 7) & 1 == 1
+
+    def __len__(self) -> int:
+        pages = self.pages.values()
+        return sum(int.from_bytes(page, "little").bit_count() for page in pages)
@@ -0,0 +1,308 @@
+"""Contains the statistics gathered during a search and its result
+
+Every search fills its own `SearchStats`. Counters such as the number of
+duplicates skipped are always kept. When profiling, the time spent in each
+phase of the search is measured too, by wrapping the functions of the hot
+path with `SearchStats.timed`. Without profiling the functions are returned
+unchanged, so disabled probes cost nothing.
+"""
+
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+from src.board import Cell
+
+__all__ = ["PHASES", "SearchStats", "SolveResult", "format_time"]
+
+PHASES = {  # phases of a search, with the phase including them if any
+    "successors": None,
+    "legality": "successors",
+    "duplicates": None,
+    "queue": None,
+    "rendering": None,
+}
+
+
+def format_time(seconds: float):
+    if seconds < 60:
+        return f"{seconds:.2f}s"
+    return f"{seconds // 60}m {seconds - 60*(seconds//60):.2f}s"
+
+
+class SearchStats:
+    """Statistics of one search
+
+    Attributes
+    ----------
+    profile : bool
+        True if the time spent in each phase is measured
+    optimal : bool
+        True if the solution found, if any, is known to be optimal
+    skip : int
+        number of duplicate states skipped
+    pruned : int
+        number of states dropped to bound the memory of the search, which
+        may have discarded better solutions
+    frontier : int
+        peak number of states waiting to be expanded
+    expanded : int, optional
+        number of states expanded, when it differs from the number of nodes
+        yielded by the solver, default = None
+    times : dict[str, float]
+        time spent in each measured phase, in seconds
+    calls : dict[str, int]
+        number of calls to each measured phase
+    solutions : list[tuple[list[Cell], float]]
+        trajectories found by anytime or pruning solvers, each shorter than
+        the previous one or known to be closer to the optimal, with the bound of their
+        number of moves over the optimal one (None if unknown)
+    on_solution : Callable[[list[Cell], float], None], optional
+        called with each trajectory added to `solutions`, default = None
+    """
+
+    def __init__(
+        self,
+        profile: bool = False,
+        on_solution: Optional[Callable[[list[Cell], Optional[float]], None]] = None,
+    ) -> None:
+        self.profile = profile
+        self.optimal = False
+        self.skip = 0
+        self.pruned = 0
+        self.frontier = 0
+        self.expanded = None
+        self.times = {}
+        self.calls = {}
+        self.solutions = []
+        self.on_solution = on_solution
+
+    def improve(self, trajectory: list[Cell], bound: Optional[float]) -> None:
+        """Record a trajectory shorter than the previous ones, or a tighter
+        bound of the last one
+
+        Parameters
+        ----------
+        trajectory : list[Cell]
+            trajectory found
+        bound : float, optional
+            it has at most `bound` times the optimal number of moves, None if
+            unknown
+        """
+        self.solutions.append((trajectory, bound))
+        if self.on_solution is not None:
+            self.on_solution(trajectory, bound)
+
+    def timed(self, phase: str, function: Callable) -> Callable:
+        """Wrap `function` to count its calls and the time spent in it as part
+        of `phase` when profiling, else return it unchanged
+
+        Parameters
+        ----------
+        phase : str
+            phase of the search, one of `PHASES`
+        function : Callable
+            function to measure
+
+        Returns
+        -------
+        Callable
+            function to call instead of `function`
+        """
+        if not self.profile:
+            return function
+        times, calls = self.times, self.calls
+        times.setdefault(phase, 0.0)
+        calls.setdefault(phase, 0)
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            res = function(*args, **kwargs)
+            times[phase] += perf_counter() - start
+            calls[phase] += 1
+            return res
+
+        return wrapper
+
+    def report(self, total: float) -> str:
+        """Per-phase breakdown of the time spent by the search
+
+        Parameters
+        ----------
+        total : float
+            duration of the search, in seconds
+
+        Returns
+        -------
+        str
+            one line per measured phase, sub-phases being indented under the
+            phase including them
+        """
+        lines = [f"{'Phase':<14}{'Calls':>10}{'Time':>12}{'Share':>8}"]
+        for phase, parent in PHASES.items():
+            if not self.calls.get(phase):
+                continue
+            name = f"  {phase}" if parent is not None else phase
+            share = 100 * self.times[phase] / total if total else 0
+            lines.append(
+                f"{name:<14}{self.calls[phase]:>10}"
+                f"{format_time(self.times[phase]):>12}{share:>7.1f}%"
+            )
+        measured = sum(
+            time for phase, time in self.times.items() if PHASES[phase] is None
+        )
+        share = 100 * (total - measured) / total if total else 0
+        lines.append(f"{'other':<14}{'':>10}{format_time(total - measured):>12}")
+        lines[-1] += f"{share:>7.1f}%"
+        lines.append(f"{'total':<14}{'':>10}{format_time(total):>12}")
+        return "\n".join(lines)
+
+
+class SolveResult:
+    """Outcome of a search
+
+    Attributes
+    ----------
+    solver : str
+        name of the solver
+    rule : str
+        rule applied to movements
+    trajectory : list[Cell]
+        solution found, None if there is none
+    time : float
+        duration of the search in seconds, pauses excluded
+    attempts : int
+        number of nodes yielded by the solver
+    stats : SearchStats
+        statistics of the search
+    segments : tuple[int, int]
+        hits and misses of the segment cache of the board, None if it was
+        not used
+    cached : bool
+        True if the result was loaded from the solution cache instead of
+        being searched
+    interrupted : bool
+        True if the search was stopped by its deadline, the trajectory being
+        the best one found so far
+    """
+
+    def __init__(
+        self,
+        solver: str,
+        rule: str,
+        trajectory: Optional[list[Cell]],
+        time: float,
+        attempts: int,
+        stats: SearchStats,
+        segments: Optional[tuple[int, int]] = None,
+        cached: bool = False,
+        interrupted: bool = False,
+    ) -> None:
+        self.solver = solver
+        self.rule = rule
+        self.trajectory = trajectory
+        self.time = time
+        self.attempts = attempts
+        self.stats = stats
+        self.segments = segments
+        self.cached = cached
+        self.interrupted = interrupted
+
+    @property
+    def solved(self) -> bool:
+        return self.trajectory is not None
+
+    @property
+    def length(self) -> Optional[int]:
+        return len(self.trajectory) if self.trajectory is not None else None
+
+    @property
+    def optimal(self) -> bool:
+        return self.solved and self.stats.optimal
+
+    @property
+    def bound(self) -> Optional[float]:
+        """The solution is at most `bound` times longer than an optimal one,
+        None if unknown"""
+        if self.optimal:
+            return 1.0
+        if self.stats.solutions and self.stats.solutions[-1][0] is self.trajectory:
+            return self.stats.solutions[-1][1]
+        return None
+
+    @property
+    def expanded(self) -> int:
+        if self.stats.expanded is None:
+            return self.attempts
+        return self.stats.expanded
+
+    def summary(self, timing: bool = False) -> str:
+        """Human readable description of the result
+
+        Parameters
+        ----------
+        timing : bool, optional
+            add the duration of the search and its counters, by default False
+
+        Returns
+        -------
+        str
+            description, one information per line
+        """
+        lines = ["Deadline reached"] if self.interrupted else []
+        if not self.solved:
+            lines.append("No solution found")
+            if self.stats.pruned:
+                lines.append("Pruning may have discarded every solution")
+        else:
+            lines.append(f"Solution found in {self.length} positions")
+            if self.optimal:
+                lines.append("Solution is optimal")
+            elif self.bound is not None:
+                lines.append(f"Solution is at most {self.bound:.2f} times optimal")
+        if timing and self.cached:
+            lines.append(f"Loaded from cache in {format_time(self.time)}")
+        elif timing:
+            lines.append(
+                f"Solved in {format_time(self.time)} in {self.attempts} attempts"
+            )
+            lines.append(f"Skiped {self.stats.skip} positions")
+            if self.stats.pruned:
+                lines.append(f"Pruned {self.stats.pruned} positions")
+            if self.segments is not None:
+                hits, misses = self.segments
+                lines.append(f"Segment cache: {hits} hits, {misses} misses")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON serializable form of the result, with the trajectory as a list
+        of [x, y] pairs (empty if there is none)"""
+        res = {
+            "solver": self.solver,
+            "rule": self.rule,
+            "solved": self.solved,
+            "length": self.length,
+            "optimal": self.optimal,
+            "time": self.time,
+            "attempts": self.attempts,
+            "expanded": self.expanded,
+            "skipped": self.stats.skip,
+            "pruned": self.stats.pruned,
+            "frontier": self.stats.frontier,
+            "cached": self.cached,
+            "interrupted": self.interrupted,
+            "bound": self.bound,
+            "trajectory": [list(cell) for cell in self.trajectory or []],
+        }
+        if self.stats.solutions:
+            res["solutions"] = [
+                {"length": len(trajectory), "bound": bound}
+                for trajectory, bound in self.stats.solutions
+            ]
+        if self.segments is not None:
+            res["segment_cache"] = dict(zip(("hits", "misses"), self.segments))
+        if self.stats.profile:
+            res["profile"] = {
+                phase: {"calls": self.stats.calls[phase], "time": time}
+                for phase, time in self.stats.times.items()
+            }
+        return res
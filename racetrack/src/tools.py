@@ -1,12 +1,24 @@
+from collections import OrderedDict, deque
 from math import sqrt
+from typing import Callable, Optional
 
-from src.color import Color
 from src.board import Cell, Board
-from src.settings import RRADIUS
+from src.field import DistanceField
+from src.settings import SEGMENT_CACHE_SIZE
 
-__all__ = ["distance", "map_cell", "filter_positions"]
+__all__ = [
+    "distance",
+    "map_cell",
+    "filter_positions",
+    "max_speed",
+    "SegmentCache",
+    "segment_cache",
+    "distance_field",
+    "finish_distances",
+]
 
-VALID_TEXTURES = {Color.WHITE, Color.DARKCYAN, Color.GREY}
+MIN_PIXEL_RADIUS = 0.75  # thinnest car that can't slip between diagonal pixels
+BLOCKED = bytes.maketrans(b"\x00\x01", b"\x01\x00")  # drivable row to obstacles
 
 
 def distance(a: Cell, b: Cell) -> float:
@@ -19,77 +31,257 @@ def map_cell(cell: Cell, ratio: int) -> Cell:
     return Cell(cell.x * ratio, cell.y * ratio)
 
 
-def bresenham(start: Cell, end: Cell, block_size: int) -> list[Cell]:
-    # https://gist.github.com/bert/1085538
-    dx, dy = abs(end.x - start.x), -abs(end.y - start.y)
-    xslope = 1 if start.x < end.x else -1
-    yslope = 1 if start.y < end.y else -1
-    err = dx + dy
-    res = [start.copy()]
-
-    if start.x == end.x:
-        end.x += 1
-    if start.y == end.y:
-        end.y += 1
-
-    count = 0
-
-    while start.x != end.x and start.y != end.y:
-        t_err = 2 * err
-        if t_err >= dy:
-            err += dy
-            start.x += xslope
-        if t_err <= dx:
-            err += dx
-            start.y += yslope
-
-        count += 1
-        if count % (block_size // 3) == 0:
-            res.append(start.copy())
+def max_speed(extent: int) -> int:
+    """Highest speed a car starting at rest can reach along an axis where only
+    `extent` cells are available, as reaching speed `n` covers at least
+    `n(n+1)/2` cells"""
+    speed = 0
+    while (speed + 1) * (speed + 2) // 2 <= extent:
+        speed += 1
+    return speed
+
+
+class SegmentCache:
+    """Least recently used cache of the validity of segments between two
+    cells, shared by everything checking moves on the same board
+
+    Attributes
+    ----------
+    maxsize : int
+        maximum number of segments remembered
+    hits : int
+        number of lookups answered by the cache
+    misses : int
+        number of lookups that needed to check the segment
+    """
+
+    def __init__(self, maxsize: int = SEGMENT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def valid(
+        self,
+        board: Board,
+        origin: Cell,
+        target: Cell,
+        check: Callable[[Board, Cell, Cell], bool],
+    ) -> bool:
+        """Check if the car can move from `origin` to `target`, using `check`
+        when the segment is not cached yet
+
+        Parameters
+        ----------
+        board : Board
+            board the segment is on
+        origin : Cell
+            start of the segment
+        target : Cell
+            end of the segment
+        check : Callable[[Board, Cell, Cell], bool]
+            function checking the segment on the board
+
+        Returns
+        -------
+        bool
+            True if the segment doesn't cross any obstacle, else False
+        """
+        key = (origin, target)
+        valid = self.entries.get(key)
+        if valid is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return valid
+
+        self.misses += 1
+        valid = check(board, origin, target)
+        self.entries[key] = valid
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return valid
+
+    def filter(
+        self,
+        board: Board,
+        origin: Cell,
+        targets: set[Cell],
+        check: Callable[[Board, Cell, list[Cell]], list[bool]],
+    ) -> set[Cell]:
+        """Keep the targets the car can reach from `origin`, checking all the
+        segments that are not cached yet with a single call to `check`
+
+        Parameters
+        ----------
+        board : Board
+            board the segments are on
+        origin : Cell
+            start of the segments
+        targets : set[Cell]
+            ends of the segments
+        check : Callable[[Board, Cell, list[Cell]], list[bool]]
+            function checking several segments from the same cell at once
+
+        Returns
+        -------
+        set[Cell]
+            targets whose segment doesn't cross any obstacle
+        """
+        res, missing = set(), []
+        for target in targets:
+            key = (origin, target)
+            valid = self.entries.get(key)
+            if valid is None:
+                missing.append(target)
+                continue
+            self.hits += 1
+            self.entries.move_to_end(key)
+            if valid:
+                res.add(target)
+
+        if missing:
+            self.misses += len(missing)
+            for target, valid in zip(missing, check(board, origin, missing)):
+                self.entries[(origin, target)] = valid
+                if valid:
+                    res.add(target)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return res
+
+    def clear(self) -> None:
+        """Forget every segment and reset the counters"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def segment_cache(board: Board) -> SegmentCache:
+    """Get the segment cache of `board`, creating it on first use"""
+    if board.segments is None:
+        board.segments = SegmentCache()
+    return board.segments
+
+
+def distance_field(board: Board) -> DistanceField:
+    """Get the distance field of `board`, computing it on first use. Obstacles
+    are the wall cells of text-based boards and the pixels of image-based
+    boards that are not a valid texture"""
+    if board.field is None:
+        if board.drivable is not None:
+            if isinstance(board.drivable, list):
+                obstacles = [row.translate(BLOCKED) for row in board.drivable]
+            else:
+                obstacles = ~board.drivable
+        else:
+            cells = board.legal | board.obstacles
+            width = max(cell.x for cell in cells) + 1
+            height = max(cell.y for cell in cells) + 1
+            obstacles = [bytearray(width) for _ in range(height)]
+            for cell in board.obstacles:
+                obstacles[cell.y][cell.x] = 1
+        board.field = DistanceField(obstacles)
+    return board.field
+
+
+def crossable(board: Board) -> Optional[set[Cell]]:
+    """Cells that any move allowed by the strict rule between two legal cells
+    can be followed through, one cell at a time. At each step along its main
+    axis, a move passes at most half a cell away from a cell, whose center on
+    text-based boards, or one of whose pixels on image-based boards, is then
+    out of reach of the obstacles. None if the car is too thin to tell"""
+    cells = board.legal | board.obstacles
+    if not cells:
+        return set()
+    width = max(cell.x for cell in cells) + 1
+    height = max(cell.y for cell in cells) + 1
+    grid = (Cell(x, y) for y in range(height) for x in range(width))
+    if board.drivable is None:
+        if board.radius <= 0.5:
+            return None
+        return {cell for cell in grid if cell not in board.obstacles}
+
+    # the pixel nearest to the move is drivable, as the car is wider than
+    # half the diagonal of a pixel
+    half = board.padding // 2 + 1
+    res = set()
+    for cell in grid:
+        x, y = cell.x * board.padding, cell.y * board.padding
+        left, top = max(0, x - half), max(0, y - half)
+        if isinstance(board.drivable, list):
+            rows = board.drivable[top : y + half + 1]
+            drivable = any(any(row[left : x + half + 1]) for row in rows)
+        else:
+            drivable = board.drivable[top : y + half + 1, left : x + half + 1].any()
+        if drivable:
+            res.add(cell)
     return res
 
 
-def filter_imagebased_position(board: Board, positions: set[Cell]) -> set[Cell]:
-    new_coords = set()
-    start = map_cell(board.trajectory[-1], board.padding)
-    for coord in positions:
-        rejected = False
-        for in_between in bresenham(
-            start.copy(), map_cell(coord, board.padding), board.padding
-        ):
-            if board.image.get(*in_between) not in VALID_TEXTURES:
-                rejected = True
-                break
-        if not rejected:
-            new_coords.add(coord)
-    return new_coords
-
-
-def filter_textbased_postion(board: Board, positions: set[Cell]) -> set[Cell]:
-    new_coords = set()
-    start = map_cell(board.trajectory[-1], board.padding)
-    for coord in positions:
-        t_coord = map_cell(coord, board.padding)
-        rejected = False
-        for in_between in bresenham(start.copy(), t_coord.copy(), board.padding):
-            for obstacles in board.obstacles:
-                obstacles = map_cell(obstacles, board.padding)
-                if distance(in_between, obstacles) <= board.padding * RRADIUS:
-                    rejected = True
-                    break
-            if rejected:
-                break
-        if not rejected:
-            new_coords.add(coord)
-    return new_coords
-
-
-def filter_positions(board: Board) -> set[Cell]:
-    positions = board.next_coords()
-
-    if not board.trajectory:
-        return positions
+def finish_distances(board: Board) -> Optional[dict[Cell, int]]:
+    """Get the number of one-cell moves, in any of the eight directions, from
+    every cell to the finish line through the cells that strict-rule moves
+    can cross, computing it on first use. Cells that can't reach the finish
+    line are absent. None if the crossed cells can't be told apart"""
+    if board.finish is None:
+        cells = crossable(board)
+        if cells is None:
+            return None
+        res = {cell: 0 for cell in board.end}
+        queue = deque(res)
+        while queue:
+            cell = queue.popleft()
+            for around in cell.neighbour():
+                if around in cells and around not in res:
+                    res[around] = res[cell] + 1
+                    queue.append(around)
+        board.finish = res
+    return board.finish
+
+
+def valid_imagebased_segments(
+    board: Board, origin: Cell, targets: list[Cell]
+) -> list[bool]:
+    start = map_cell(origin, board.padding)
+    ends = [tuple(map_cell(target, board.padding)) for target in targets]
+    radius = max(board.radius * board.padding, MIN_PIXEL_RADIUS)
+    return distance_field(board).segments_clear(*start, ends, radius)
+
+
+def valid_textbased_segment(board: Board, origin: Cell, target: Cell) -> bool:
+    return distance_field(board).segment_clear(*origin, *target, board.radius)
+
+
+def filter_imagebased_position(
+    board: Board, origin: Cell, positions: set[Cell]
+) -> set[Cell]:
+    return segment_cache(board).filter(
+        board, origin, positions, valid_imagebased_segments
+    )
+
+
+def filter_textbased_postion(
+    board: Board, origin: Cell, positions: set[Cell]
+) -> set[Cell]:
+    cache = segment_cache(board)
+    return {
+        coord
+        for coord in positions
+        if cache.valid(board, origin, coord, valid_textbased_segment)
+    }
+
+
+def filter_positions(
+    board: Board, positions: set[Cell] = None, origin: Cell = None
+) -> set[Cell]:
+    if positions is None:
+        positions = board.next_coords()
+
+    if origin is None:
+        if not board.trajectory:
+            return positions
+        origin = board.trajectory[-1]
 
     if board.image is not None:
-        return filter_imagebased_position(board, positions)
-    return filter_textbased_postion(board, positions)
+        return filter_imagebased_position(board, origin, positions)
+    return filter_textbased_postion(board, origin, positions)
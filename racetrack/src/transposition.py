@@ -0,0 +1,73 @@
+"""Contains a fixed-size transposition table, used by depth first solvers to
+prune states already explored without keeping every visited state in memory
+"""
+
+from typing import Hashable
+
+__all__ = ["TranspositionTable"]
+
+
+class TranspositionTable:
+    """Direct-mapped table remembering the smallest depth at which a state was
+    reached during an iteration of a search.
+
+    Each state can only be stored in one slot, chosen by its hash. When two
+    states compete for the same slot, entries of a previous iteration are
+    always replaced, otherwise the shallowest entry is kept as it prunes the
+    largest subtree.
+
+    Attributes
+    ----------
+    size : int
+        number of slots of the table
+    iteration : int
+        current iteration, entries of older iterations are considered empty
+    """
+
+    __slots__ = ("size", "iteration", "keys", "depths", "iterations")
+
+    def __init__(self, size: int) -> None:
+        """Constructor of the 'TranspositionTable' object
+
+        Parameters
+        ----------
+        size : int
+            number of slots of the table
+        """
+        self.size = size
+        self.iteration = 0
+        self.keys = [None] * size
+        self.depths = [0] * size
+        self.iterations = [-1] * size
+
+    def next_iteration(self) -> None:
+        """Invalidate every entry stored so far"""
+        self.iteration += 1
+
+    def visit(self, key: Hashable, depth: int) -> bool:
+        """Record that the state `key` was reached at `depth`
+
+        Parameters
+        ----------
+        key : Hashable
+            state reached
+        depth : int
+            depth at which the state was reached
+
+        Returns
+        -------
+        bool
+            False if the state was already reached at the same depth or
+            shallower during the current iteration, else True
+        """
+        slot = hash(key) % self.size
+        if self.iterations[slot] == self.iteration:
+            if self.keys[slot] == key:
+                if self.depths[slot] <= depth:
+                    return False
+            elif self.depths[slot] <= depth:
+                return True
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.iterations[slot] = self.iteration
+        return True
@@ -0,0 +1,165 @@
+"""Contains a breadth first search computed on whole arrays of states
+
+Under the lax rule, a state is a position and a speed on a bounded grid. The
+frontier and the visited states are stored as boolean arrays indexed by
+`[vx, vy, y, x]`, so a full level of the search is computed with a few array
+shifts and masks instead of one cell at a time. Coasting moves every position
+by its own speed, a shear of the array computed at once through a strided
+view of a padded copy of the frontier. Requires NumPy.
+"""
+
+from typing import Generator
+from warnings import warn
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from src.board import Cell, Board, neighbour
+from src.node import Node
+from src.settings import LAX_RULE
+from src.stats import SearchStats
+from src.tools import max_speed
+
+__all__ = ["NUMPY_AVAILABLE", "vectorized_search"]
+
+ACCELERATIONS = sorted(tuple(offset) for offset in neighbour)
+START = len(ACCELERATIONS)  # predecessor code of starting states
+
+
+def shift(array: "np.ndarray", offsets: tuple[int, ...]) -> "np.ndarray":
+    """Translate `array` by `offsets` along each axis, filling with False"""
+    res = np.zeros_like(array)
+    source, target = [], []
+    for offset, size in zip(offsets, array.shape):
+        if abs(offset) >= size:
+            return res
+        source.append(slice(max(0, -offset), size - max(0, offset)))
+        target.append(slice(max(0, offset), size - max(0, -offset)))
+    res[tuple(target)] = array[tuple(source)]
+    return res
+
+
+def coaster(
+    shape: tuple[int, ...], max_x: int, max_y: int
+) -> tuple["np.ndarray", "np.ndarray"]:
+    """Buffer of `shape` surrounded by a margin of the largest speed, and a
+    view of it in which the state `[vx, vy, y, x]` is the state of the buffer
+    coasting to `(x, y)`, that is `[vx, vy, y - vy + max_y, x - vx + max_x]`.
+    The margin is never written, so states coasting from outside the grid
+    are False"""
+    speeds_x, speeds_y, height, width = shape
+    padded = np.zeros(
+        (speeds_x, speeds_y, height + 2 * max_y, width + 2 * max_x), dtype=bool
+    )
+    buffer = padded[:, :, max_y : max_y + height, max_x : max_x + width]
+    s0, s1, s2, s3 = padded.strides
+    view = np.lib.stride_tricks.as_strided(
+        padded[:, :, 2 * max_y :, 2 * max_x :],
+        shape=shape,
+        strides=(s0 - s3, s1 - s2, s2, s3),
+        writeable=False,
+    )
+    return buffer, view
+
+
+def vectorized_search(
+    board: Board, rule: str, stats: SearchStats = None
+) -> Generator[Node, None, list[Cell]]:
+    """Breadth first search over every (position, speed) state at once, one
+    level per iteration. Moves keeping the car still are never generated,
+    other returns to an already visited cell are not checked as the search
+    does not keep track of trajectories: if the trajectory found goes twice
+    through the same cell, a `RuntimeWarning` is issued and the search is
+    restarted with `breadth_search`"""
+    stats = SearchStats() if stats is None else stats
+    stats.expanded = 0
+    stats.optimal = True
+    move = stats.timed("successors", shift)
+    coast = stats.timed("successors", np.ascontiguousarray)
+    if not board.start:
+        return None
+
+    width = max(cell.x for cell in board.legal) + 1
+    height = max(cell.y for cell in board.legal) + 1
+    max_x, max_y = max_speed(width - 1), max_speed(height - 1)
+    shape = (2 * max_x + 1, 2 * max_y + 1, height, width)
+
+    legal = np.zeros(shape, dtype=bool)
+    for cell in board.legal:
+        legal[:, :, cell.y, cell.x] = True
+    legal[max_x, max_y] = False  # a null speed keeps the car on the same cell
+    end = np.zeros((height, width), dtype=bool)
+    for cell in board.end:
+        end[cell.y, cell.x] = True
+
+    frontier = np.zeros(shape, dtype=bool)
+    predecessors = np.zeros(shape, dtype=np.uint8)
+    for cell in board.start:
+        frontier[max_x, max_y, cell.y, cell.x] = True
+        predecessors[max_x, max_y, cell.y, cell.x] = START
+    visited = frontier.copy()
+    buffer, coasted = coaster(shape, max_x, max_y)
+
+    while frontier.any():
+        hits = frontier & end
+        if hits.any():
+            trajectory = found(predecessors, np.argwhere(hits)[0], max_x, max_y)
+            if len(set(trajectory)) == len(trajectory):
+                board.trajectory = trajectory
+                return trajectory
+            from src.solve import breadth_search
+
+            warn(
+                "the trajectory found by the vectorized search goes twice "
+                "through the same cell, searching again with breadth_search",
+                RuntimeWarning,
+            )
+            stats.expanded = None  # the nodes expanded are the ones yielded
+            return (yield from breadth_search(board, rule, stats))
+
+        size = int(np.count_nonzero(frontier))
+        stats.expanded += size
+        stats.frontier = max(stats.frontier, size)
+        vx, vy, y, x = (int(value) for value in np.argwhere(frontier)[0])
+        yield Node(Cell(x, y), Cell(vx - max_x, vy - max_y))
+
+        # coasting: every position moves by its own speed
+        buffer[...] = frontier
+        moved = coast(coasted)
+
+        # accelerating: speed and position both move by the acceleration
+        reached = np.zeros(shape, dtype=bool)
+        for code, (ax, ay) in enumerate(ACCELERATIONS):
+            candidates = move(moved, (ax, ay, ay, ax)) & legal
+            stats.skip += int(np.count_nonzero(candidates & visited))
+            new = candidates & ~visited & ~reached
+            predecessors[new] = code
+            reached |= new
+        visited |= reached
+        frontier = reached
+    return None
+
+
+vectorized_search.rules = {LAX_RULE}
+
+
+def found(
+    predecessors: "np.ndarray",
+    state: "np.ndarray",
+    max_x: int,
+    max_y: int,
+) -> list[Cell]:
+    """Rebuild the trajectory leading to `state` from the predecessors codes"""
+    vx, vy, y, x = (int(value) for value in state)
+    trajectory = [Cell(x, y)]
+    while predecessors[vx, vy, y, x] != START:
+        ax, ay = ACCELERATIONS[predecessors[vx, vy, y, x]]
+        x, y = x - (vx - max_x), y - (vy - max_y)
+        vx, vy = vx - ax, vy - ay
+        trajectory.append(Cell(x, y))
+    trajectory.reverse()
+    return trajectory
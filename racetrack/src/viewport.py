@@ -0,0 +1,140 @@
+"""Contains the region of the board shown in the window
+
+Boards can be much larger than the screen, so the window shows a viewport: a
+region of the board, panned and zoomed by the user. Coordinates of the board
+are in pixels at zoom 1, as cells are drawn `padding` pixels apart, and are
+converted to coordinates of the window by the viewport. Drawing functions use
+it to skip everything outside the window, so rendering costs depend on what is
+on screen rather than on the size of the board.
+"""
+
+from math import floor
+from typing import Callable
+
+from src.settings import ZOOM_LEVELS
+
+__all__ = ["Viewport"]
+
+
+class Viewport:
+    """Region of the board shown in the window
+
+    Attributes
+    ----------
+    width : int
+        width of the window in pixels
+    height : int
+        height of the window in pixels
+    board_width : float
+        width of the board in pixels at zoom 1
+    board_height : float
+        height of the board in pixels at zoom 1
+    zoom : float
+        number of window pixels per board pixel, one of `ZOOM_LEVELS`
+    x : int
+        abscissa of the left side of the window on the zoomed board
+    y : int
+        ordinate of the top side of the window on the zoomed board
+    listeners : list[Callable[[], None]]
+        called in order each time the viewport moves
+    """
+
+    def __init__(
+        self, width: int, height: int, board_width: float, board_height: float
+    ) -> None:
+        """Constructor of the 'Viewport' object, showing the top left corner
+        of the board at zoom 1
+
+        Parameters
+        ----------
+        width : int
+            width of the window in pixels
+        height : int
+            height of the window in pixels
+        board_width : float
+            width of the board in pixels
+        board_height : float
+            height of the board in pixels
+        """
+        self.width = width
+        self.height = height
+        self.board_width = board_width
+        self.board_height = board_height
+        self.zoom = 1
+        self.x = 0
+        self.y = 0
+        self.listeners = []
+
+    def to_window(self, x: float, y: float) -> tuple[float, float]:
+        """Window coordinates of the board point (x, y)"""
+        return x * self.zoom - self.x, y * self.zoom - self.y
+
+    def to_board(self, x: float, y: float) -> tuple[float, float]:
+        """Board coordinates of the window point (x, y)"""
+        return (x + self.x) / self.zoom, (y + self.y) / self.zoom
+
+    def bounds(self, margin: float = 0) -> tuple[float, float, float, float]:
+        """Left, top, right and bottom board coordinates of the region shown,
+        widened by `margin` window pixels on every side"""
+        left, top = self.to_board(-margin, -margin)
+        right, bottom = self.to_board(self.width + margin, self.height + margin)
+        return left, top, right, bottom
+
+    def cells(self, padding: float, margin: float = 0) -> tuple[int, int, int, int]:
+        """First and last columns, then first and last rows, of the cells
+        shown, cells being `padding` board pixels apart"""
+        left, top, right, bottom = self.bounds(margin)
+        return (
+            -floor(-left / padding),
+            -floor(-top / padding),
+            floor(right / padding),
+            floor(bottom / padding),
+        )
+
+    def visible(
+        self, ax: float, ay: float, bx: float, by: float, margin: float = 0
+    ) -> bool:
+        """Check if the box of the board points (ax, ay) and (bx, by), widened
+        by `margin` window pixels, crosses the window"""
+        left, top, right, bottom = self.bounds(margin)
+        return (
+            min(ax, bx) <= right
+            and max(ax, bx) >= left
+            and min(ay, by) <= bottom
+            and max(ay, by) >= top
+        )
+
+    def watch(self, listener: Callable[[], None]) -> None:
+        """Call `listener` each time the viewport moves"""
+        self.listeners.append(listener)
+
+    def unwatch(self, listener: Callable[[], None]) -> None:
+        self.listeners.remove(listener)
+
+    def move(self, x: float, y: float, zoom: float) -> None:
+        """Show the zoomed board from (x, y), kept within the board, then
+        notify the listeners if the viewport moved"""
+        right = max(0, round(self.board_width * zoom) - self.width)
+        bottom = max(0, round(self.board_height * zoom) - self.height)
+        x, y = min(max(0, round(x)), right), min(max(0, round(y)), bottom)
+        if (x, y, zoom) == (self.x, self.y, self.zoom):
+            return
+        self.x, self.y, self.zoom = x, y, zoom
+        for listener in list(self.listeners):
+            listener()
+
+    def pan(self, dx: float, dy: float) -> None:
+        """Move the viewport by (dx, dy) window pixels"""
+        self.move(self.x + dx, self.y + dy, self.zoom)
+
+    def zoom_by(self, steps: int, x: float = None, y: float = None) -> None:
+        """Zoom in by `steps` levels of `ZOOM_LEVELS`, out if negative, the
+        board point under the window point (x, y) staying in place. The
+        window point is the center of the window by default"""
+        x = self.width / 2 if x is None else x
+        y = self.height / 2 if y is None else y
+        level = min(ZOOM_LEVELS, key=lambda level: abs(level - self.zoom))
+        index = ZOOM_LEVELS.index(level) + steps
+        zoom = ZOOM_LEVELS[min(max(0, index), len(ZOOM_LEVELS) - 1)]
+        bx, by = self.to_board(x, y)
+        self.move(bx * zoom - x, by * zoom - y, zoom)